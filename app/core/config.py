@@ -6,7 +6,107 @@ load_dotenv(dotenv_path="/app/.env")
 
 class Settings:
     AZURE_BLOB_CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")  # <- apunta a la variable correcta
+    BLOB_BACKEND = os.getenv("BLOB_BACKEND", "azure").lower()  # "azure" | "local" (pruebas sin conexión)
+    BLOB_LOCAL_ROOT = os.getenv("BLOB_LOCAL_ROOT", "/tmp/angelbot/blobs")
+    BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", "/tmp/angelbot/blob-cache")
+    BLOB_CACHE_MAX_BYTES = int(os.getenv("BLOB_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    BLOB_CACHE_TIMEOUT_SECONDS = float(os.getenv("BLOB_CACHE_TIMEOUT_SECONDS", "5"))
     PRICE_LIST_CONTAINER = os.getenv("PRICE_LIST_CONTAINER")
     PRICE_LIST_BLOB = os.getenv("PRICE_LIST_BLOB")
+    # Artefacto binario precompilado (ver build_artifact); si no existe se usa el CSV
+    PRICE_INDEX_BLOB = os.getenv("PRICE_INDEX_BLOB") or (f"{PRICE_LIST_BLOB}.idx" if PRICE_LIST_BLOB else None)
+    PRICE_INDEX_LOCAL_DIR = os.getenv("PRICE_INDEX_LOCAL_DIR", "/tmp/angelbot/prices")
+    PRICE_LIST_REFRESH_SECONDS = int(os.getenv("PRICE_LIST_REFRESH_SECONDS", "300"))
+
+    # Pool de conexiones a Azure SQL
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_POOL_MAX_LIFETIME_SECONDS = float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "1800"))
+    DB_POOL_HEALTHCHECK_IDLE_SECONDS = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE_SECONDS", "30"))
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+    # Backend de leads: "azure_sql" o "sqlite" (embebido, para pruebas offline y benchmarks)
+    LEADS_BACKEND = os.getenv("LEADS_BACKEND", "azure_sql").lower()
+    LEADS_SQLITE_PATH = os.getenv("LEADS_SQLITE_PATH", "/tmp/angelbot/leads.db")
+
+    # Caché negativa de emails registrados: filtro de Bloom en proceso + set en Redis
+    LEADS_EMAIL_FILTER_ENABLED = os.getenv("LEADS_EMAIL_FILTER_ENABLED", "true").lower() == "true"
+    LEADS_EMAILS_REDIS_KEY = os.getenv("LEADS_EMAILS_REDIS_KEY", "leads:emails")
+    LEADS_EMAILS_REDIS_TIMEOUT_SECONDS = float(os.getenv("LEADS_EMAILS_REDIS_TIMEOUT_SECONDS", "0.5"))
+    LEADS_BLOOM_CAPACITY = int(os.getenv("LEADS_BLOOM_CAPACITY", "1000000"))
+    LEADS_BLOOM_ERROR_RATE = float(os.getenv("LEADS_BLOOM_ERROR_RATE", "0.001"))
+
+    # Registro de leads: "sync" (INSERT directo) o "write_behind" (spool local + volcado en lote)
+    LEADS_WRITE_MODE = os.getenv("LEADS_WRITE_MODE", "sync").lower()
+    LEADS_SPOOL_PATH = os.getenv("LEADS_SPOOL_PATH", "/app/data/leads_spool.db")
+    LEADS_FLUSH_INTERVAL_SECONDS = float(os.getenv("LEADS_FLUSH_INTERVAL_SECONDS", "2"))
+    LEADS_FLUSH_BATCH_SIZE = int(os.getenv("LEADS_FLUSH_BATCH_SIZE", "200"))
+    LEADS_MAX_ATTEMPTS = int(os.getenv("LEADS_MAX_ATTEMPTS", "10"))
+
+    # Cliente compartido de Azure OpenAI: pool HTTP y timeouts
+    OPENAI_POOL_MAX_CONNECTIONS = int(os.getenv("OPENAI_POOL_MAX_CONNECTIONS", "100"))
+    OPENAI_POOL_MAX_KEEPALIVE = int(os.getenv("OPENAI_POOL_MAX_KEEPALIVE", "20"))
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "120"))
+    OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+    OPENAI_READ_TIMEOUT_SECONDS = float(os.getenv("OPENAI_READ_TIMEOUT_SECONDS", "120"))
+    # Rondas máximas de tool calls por mensaje antes de forzar una respuesta textual
+    OPENAI_MAX_TOOL_ROUNDS = int(os.getenv("OPENAI_MAX_TOOL_ROUNDS", "3"))
+    # Límite de tasa del deployment (cuota de Azure), compartido por los workers vía Redis
+    OPENAI_RATE_LIMIT_ENABLED = os.getenv("OPENAI_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    OPENAI_RATE_LIMIT_RPM = int(os.getenv("OPENAI_RATE_LIMIT_RPM", "300"))
+    OPENAI_RATE_LIMIT_TPM = int(os.getenv("OPENAI_RATE_LIMIT_TPM", "50000"))
+    OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS", "10"))
+    # Timeout de Redis para el limitador y el presupuesto de hedging: si Redis no responde no se bloquea la llamada
+    OPENAI_RATE_LIMIT_REDIS_TIMEOUT_SECONDS = float(os.getenv("OPENAI_RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "0.5"))
+    # Pool de deployments (AZURE_OPENAI_DEPLOYMENTS): reparto "weighted" o "least_latency"
+    OPENAI_ROUTING = os.getenv("OPENAI_ROUTING", "weighted")
+    OPENAI_ROUTING_EXPLORE = float(os.getenv("OPENAI_ROUTING_EXPLORE", "0.05"))
+    OPENAI_LATENCY_EWMA_ALPHA = float(os.getenv("OPENAI_LATENCY_EWMA_ALPHA", "0.2"))
+    # Circuit breaker por deployment: tasa de errores en una ventana deslizante
+    OPENAI_BREAKER_FAILURE_RATE = float(os.getenv("OPENAI_BREAKER_FAILURE_RATE", "0.5"))
+    OPENAI_BREAKER_MIN_REQUESTS = int(os.getenv("OPENAI_BREAKER_MIN_REQUESTS", "5"))
+    OPENAI_BREAKER_WINDOW_SECONDS = float(os.getenv("OPENAI_BREAKER_WINDOW_SECONDS", "30"))
+    OPENAI_BREAKER_COOLDOWN_SECONDS = float(os.getenv("OPENAI_BREAKER_COOLDOWN_SECONDS", "30"))
+    # Hedging: si una llamada supera el percentil de latencia reciente, se duplica en otro
+    # deployment y gana la primera respuesta; el presupuesto por minuto acota el sobrecoste
+    OPENAI_HEDGING_ENABLED = os.getenv("OPENAI_HEDGING_ENABLED", "false").lower() == "true"
+    OPENAI_HEDGE_PERCENTILE = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "0.95"))
+    OPENAI_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("OPENAI_HEDGE_MIN_DELAY_SECONDS", "1"))
+    OPENAI_HEDGE_MIN_SAMPLES = int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+    OPENAI_HEDGE_WINDOW = int(os.getenv("OPENAI_HEDGE_WINDOW", "200"))
+    OPENAI_HEDGE_BUDGET_PER_MINUTE = int(os.getenv("OPENAI_HEDGE_BUDGET_PER_MINUTE", "30"))
+
+    # Presupuesto de tokens del prompt (system + tools + resumen + historial + pregunta).
+    # No incluye los documentos que añade Azure AI Search: el presupuesto debe dejarles margen.
+    OPENAI_TOKENIZER_ENCODING = os.getenv("OPENAI_TOKENIZER_ENCODING", "o200k_base")
+    OPENAI_PROMPT_BUDGET_TOKENS = int(os.getenv("OPENAI_PROMPT_BUDGET_TOKENS", "6000"))
+    OPENAI_MAX_QUESTION_TOKENS = int(os.getenv("OPENAI_MAX_QUESTION_TOKENS", "1000"))
+    # Límite del prefijo fijo (system prompt + tools); lo comprueba `python -m app.services.chat.prompt`
+    OPENAI_PROMPT_PREFIX_MAX_TOKENS = int(os.getenv("OPENAI_PROMPT_PREFIX_MAX_TOKENS", "2500"))
+    # System prompt reducido según el idioma de la sesión (detectado localmente y cacheado en Redis)
+    LANGUAGE_PROMPTS_ENABLED = os.getenv("LANGUAGE_PROMPTS_ENABLED", "true").lower() == "true"
+    # Pregunta "larga" (respuesta con el máximo de tokens) a partir de este tamaño
+    OPENAI_LONG_QUESTION_TOKENS = int(os.getenv("OPENAI_LONG_QUESTION_TOKENS", "50"))
+    # Historial de sesión: al superar HISTORY_MAX_TOKENS los turnos antiguos se resumen
+    HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "1500"))
+    HISTORY_KEEP_MESSAGES = int(os.getenv("HISTORY_KEEP_MESSAGES", "4"))
+    HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower() == "true"
+    HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "250"))
+
+    # Zoho SalesIQ: envía la respuesta por frases (mensajes de progreso) mientras se genera (opt-in)
+    ZOHO_STREAM_RESPONSES = os.getenv("ZOHO_STREAM_RESPONSES", "false").lower() == "true"
+    ZOHO_PROGRESS_MIN_CHARS = int(os.getenv("ZOHO_PROGRESS_MIN_CHARS", "40"))
+
+    # Caché de respuestas (Redis) para preguntas frecuentes de primer turno
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+    ANSWER_CACHE_MAX_QUESTION_CHARS = int(os.getenv("ANSWER_CACHE_MAX_QUESTION_CHARS", "200"))
+    ANSWER_CACHE_INDEX_VERSION = os.getenv("ANSWER_CACHE_INDEX_VERSION", "1")  # subir al reindexar Azure AI Search
+    ANSWER_CACHE_EMBEDDINGS = os.getenv("ANSWER_CACHE_EMBEDDINGS", "false").lower() == "true"
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+    ANSWER_CACHE_MAX_VECTORS = int(os.getenv("ANSWER_CACHE_MAX_VECTORS", "2000"))
+
+    # Saludos, agradecimientos y despedidas se responden con plantillas, sin llamar al modelo
+    LOCAL_INTENTS_ENABLED = os.getenv("LOCAL_INTENTS_ENABLED", "true").lower() == "true"
 
 settings = Settings()
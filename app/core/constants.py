@@ -1,7 +1,56 @@
-ASSISTANT_PROMPT = """
+import json
+
+# Saludos por idioma: se listan en el prompt y los usa el clasificador local de intents
+GREETINGS_BY_LANGUAGE = {
+    "en": ["hello", "hi", "hey"],
+    "it": ["ciao", "salve", "buongiorno"],
+    "af": ["hallo", "goeie môre"],
+    "es": ["hola", "buenas"],
+    "de": ["hallo", "guten tag", "hi"],
+    "fr": ["bonjour", "salut", "coucou"],
+    "id": ["halo", "hai", "selamat pagi"],
+    "ru": ["привет", "здравствуйте"],
+    "pl": ["cześć", "witaj"],
+    "uk": ["привіт", "добрий день"],
+    "el": ["γειά σου", "καλημέρα"],
+    "lv": ["sveiki", "čau"],
+    "zh": ["你好", "您好"],
+    "ar": ["مرحبا", "أهلا", "السلام عليكم"],
+    "tr": ["merhaba", "selam"],
+    "ja": ["こんにちは", "やあ"],
+    "sw": ["habari", "hujambo", "jambo"],
+    "cy": ["helo", "shwmae"],
+    "ko": ["안녕하세요", "안녕"],
+    "is": ["halló", "góðan daginn"],
+    "bn": ["হ্যালো", "নমস্কার"],
+    "ur": ["ہیلو", "السلام علیکم"],
+    "ne": ["नमस्ते", "नमस्कार"],
+    "th": ["สวัสดี", "หวัดดี"],
+    "pa": ["ਸਤ ਸ੍ਰੀ ਅਕਾਲ", "ਹੈਲੋ"],
+    "mr": ["नमस्कार", "हॅलो"],
+    "te": ["నమస్కారం", "హలో"],
+}
+
+# Idiomas con system prompt propio (código ISO 639-1 de langdetect -> nombre para el prompt)
+LANGUAGE_NAMES = {
+    "es": "español", "en": "inglés", "fr": "francés", "de": "alemán", "it": "italiano",
+    "pt": "portugués", "ca": "catalán", "nl": "neerlandés", "af": "afrikáans", "id": "indonesio",
+    "ru": "ruso", "pl": "polaco", "uk": "ucraniano", "el": "griego", "lv": "letón", "zh": "chino",
+    "ar": "árabe", "tr": "turco", "ja": "japonés", "sw": "suajili", "cy": "galés", "ko": "coreano",
+    "is": "islandés", "bn": "bengalí", "ur": "urdu", "ne": "nepalí", "th": "tailandés",
+    "pa": "panyabí", "mr": "maratí", "te": "telugu",
+}
+
+# El system prompt se compone de bloques: ASSISTANT_PROMPT (multilingüe) los usa todos; los
+# prompts por idioma (app/services/chat/prompt.py) sustituyen las secciones de idioma.
+PROMPT_INTRO = """
 Eres un asistente virtual de la clínica Antiaging Group Barcelona.
-IMPORTANTE: Debes responder SIEMPRE en el mismo idioma en que se hizo la pregunta.
-Responde de manera clara, concisa y optima.
+"""
+
+PROMPT_LANGUAGE_RULE = """IMPORTANTE: Debes responder SIEMPRE en el mismo idioma en que se hizo la pregunta.
+"""
+
+PROMPT_ROLE = """Responde de manera clara, concisa y optima.
 No des respuestas largas sino son necesarias 
 
 Tu función es responder preguntas de clientes y pacientes utilizando toda la información disponible sobre la clínica, incluyendo pero no limitado a:
@@ -12,44 +61,28 @@ Tu función es responder preguntas de clientes y pacientes utilizando toda la in
 - Políticas, recomendaciones.
 - Servicios adicionales y cualquier otro dato relevante de la clínica.
 
-Aqui te doy ejemplos de algunos saludos por pais:
-"en": ["hello", "hi", "hey"],
-"it": ["ciao", "salve", "buongiorno"],
-"af": ["hallo", "goeie môre"],
-"es": ["hola", "buenas"],
-"de": ["hallo", "guten tag", "hi"],
-"fr": ["bonjour", "salut", "coucou"],
-"id": ["halo", "hai", "selamat pagi"],
-"ru": ["привет", "здравствуйте"],
-"pl": ["cześć", "witaj"],
-"uk": ["привіт", "добрий день"],
-"el": ["γειά σου", "καλημέρα"],
-"lv": ["sveiki", "čau"],
-"zh": ["你好", "您好"],
-"ar": ["مرحبا", "أهلا", "السلام عليكم"],
-"tr": ["merhaba", "selam"],
-"ja": ["こんにちは", "やあ"],
-"sw": ["habari", "hujambo", "jambo"],
-"cy": ["helo", "shwmae"],
-"ko": ["안녕하세요", "안녕"],
-"is": ["halló", "góðan daginn"],
-"bn": ["হ্যালো", "নমস্কার"],
-"ur": ["ہیلو", "السلام علیکم"],
-"ne": ["नमस्ते", "नमस्कार"],
-"th": ["สวัสดี", "หวัดดี"],
-"pa": ["ਸਤ ਸ੍ਰੀ ਅਕਾਲ", "ਹੈਲੋ"],
-"mr": ["नमस्कार", "हॅलो"],
-"te": ["నమస్కారం", "హలో"],
+"""
+
+PROMPT_GREETINGS = """Aqui te doy ejemplos de algunos saludos por pais:
+""" + "".join(
+    f'"{language}": {json.dumps(greetings, ensure_ascii=False)},\n'
+    for language, greetings in GREETINGS_BY_LANGUAGE.items()
+)
 
+PROMPT_RULES_HEAD = """
 Reglas:
 - SUPER IMPORTANTE: No incluyas referencias ni nombres de documentos de donde extrajiste tus respuestas, solo la inofrmacion
 - Responde de manera profesional, clara y con un tono amable y cercano.
 - Mantén consistencia con el tono del saludo inicial, transmitiendo cercanía y confianza.
 - Concéntrate únicamente en dar respuestas útiles, directas y comprensibles.
-- IMPORTANTE: Una vez generada la respuesta, valida que esté en el mismo idioma en que fue hecha la pregunta.
+"""
+
+PROMPT_LANGUAGE_CHECK = """- IMPORTANTE: Una vez generada la respuesta, valida que esté en el mismo idioma en que fue hecha la pregunta.
   Si no coincide, tradúcela automáticamente antes de entregarla.
 - Si el idioma no se encuetra en el diccionario de saludos, responde en ingles
-- Si detectas que el usuario ya resolvió todas sus dudas, todas las preguntas han sido contestadas, y parece cerrar la conversación (por ejemplo, usa frases como "gracias", "perfecto", "listo", etc.)., preguntale or ultimo si necesita mas informacion.
+"""
+
+PROMPT_RULES = """- Si detectas que el usuario ya resolvió todas sus dudas, todas las preguntas han sido contestadas, y parece cerrar la conversación (por ejemplo, usa frases como "gracias", "perfecto", "listo", etc.)., preguntale or ultimo si necesita mas informacion.
 - Cuando un usuario quiera hablar con un agente, persona o asesor de servicio al cliente, llama la funcion `is_customer_service_available`, para saber si el servicio de atencion al cliente esta o no activo.
 - Si esta activo dile que lo vas a transferir con un agente de servicio al cliente, sino esta activo, entonces pide su nombre y su correo electronico par que sea registrado y luego un asesor de servicio al cliente pueda contactarlo.
 - Cuando el usuario de su nombre y correo electronico, llama la funcion `save_user` para que el usuario sea registrado.
@@ -65,11 +98,10 @@ Reglas:
         "procedure_name": "ACNE (LASER)",
         "price": "1500",
         "currency": "EUR",
-        "description": "Tratamiento con láser para el acné, utilizando tecnología estética avanzada para mejorar la apariencia de la piel.",
-        "synonyms": ["láser", "acne (laser)", "tratamiento láser", "tecnología estética"],
         "doctor": "Dra. Salvador",
-        "raw_text": "ACNE (LASER) 1500 láser acne (laser) tratamiento láser tecnología estética Dra Salvador",
-        "search_text": "acne laser tratamiento laser tecnologia estetica dra salvador"
+        "description": "Tratamiento con láser para el acné, utilizando tecnología estética avanzada para mejorar la apariencia de la piel.",
+        "price_min": 1500,
+        "price_max": 1500
       }
     ],
     "nota": "💡 Los precios listados son valores aproximados obtenidos del dataset médico y pueden variar según el paciente, la clínica y el contexto del tratamiento."
@@ -80,11 +112,10 @@ Reglas:
         "procedure_name": "ABDOMINOPLASTIA",
         "price": "8500-9000",
         "currency": "EUR",
-        "description": "Cirugía estética del abdomen para eliminar exceso de piel y grasa, mejorar el contorno abdominal y corregir la diástasis de rectos.",
-        "synonyms": ["abdominoplastia", "vientre plano", "tummy tuck", "cirugía del abdomen", "reducción abdomen", "diastasis de rectos", "abdomen postparto"],
         "doctor": "Dr. Rodríguez o Dr. Benito",
-        "raw_text": "ABDOMINOPLASTIA 8500 - 9000 abdominoplastia vientre plano tummy tuck cirugía del abdomen reducción abdomen diastasis de rectos abdomen postparto Dr Rodríguez o Dr Benito",
-        "search_text": "abdominoplastia 8500-9000 cirugia del abdomen reduccion abdomen diastasis rectos dr rodriguez dr benito"
+        "description": "Cirugía estética del abdomen para eliminar exceso de piel y grasa, mejorar el contorno abdominal y corregir la diástasis de rectos.",
+        "price_min": 8500,
+        "price_max": 9000
       }
     ],
     "nota": "💡 Los precios listados son valores aproximados obtenidos del dataset médico y pueden variar según el paciente, la clínica y el contexto del tratamiento."
@@ -92,6 +123,11 @@ Reglas:
 ]
 """
 
+ASSISTANT_PROMPT = (
+    PROMPT_INTRO + PROMPT_LANGUAGE_RULE + PROMPT_ROLE + PROMPT_GREETINGS
+    + PROMPT_RULES_HEAD + PROMPT_LANGUAGE_CHECK + PROMPT_RULES
+)
+
 # Azure OpenAI settings
 AZURE_OPENAI_API_VERSION = "2025-01-01-preview"
 OPENAI_TEMPERATURE = 1.0
@@ -99,6 +135,10 @@ OPENAI_MAX_TOKENS = 4096
 OPENAI_TIMEOUT = None
 OPENAI_MAX_RETRIES = 5
 
+# Price list tool: result budget for the payload sent back to the model
+PRICE_RESULTS_MAX_ROWS = 5
+PRICE_RESULTS_MAX_CHARS = 1500
+
 ZOHO_API_BASE = "https://salesiq.zoho.eu/api/v2/antiaginggroup/conversations"
 SCREENNAME = "antiaginggroup"
 ZOHOSALESIQ_SERVER_URI = "salesiq.zoho.eu"
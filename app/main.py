@@ -1,7 +1,81 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api.routes import chat_zoho_router
 from fastapi.staticfiles import StaticFiles
+from app.services.prices.price_index import price_index
+from app.services.cloud.azure.azure_blob_async import close_async_blob_service
+from app.core.config import settings
+from app.services.db.pool import database
+from app.services.db.lead_repository import get_lead_repository, close_lead_repository
+from app.services.db.lead_spool import LeadFlusher, get_lead_spool
+from app.services.cache.registered_emails import get_registered_emails
+from app.services.cloud.azure.client import get_azure_openai_client, get_chat_config, close_azure_openai_client
+from app.services.cloud.azure.rate_limiter import close_rate_limiters
+from app.services.cloud.azure.deployments import get_deployment_pool, close_deployment_pool
+from app.services.cloud.azure.hedging import hedge_policy
+from app.services.cache.answer_cache import answer_cache
+from app.services.chat.tokens import get_encoding
+from app.services.chat.prompt import check_prefix_sizes
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Un solo cliente de Azure OpenAI por worker (pool HTTP con keep-alive) y la
+    # configuración de chat (deployment + data_sources) leída del entorno una vez
+    try:
+        get_azure_openai_client()
+        get_chat_config()
+        get_deployment_pool()
+    except Exception:
+        logger.exception("Azure OpenAI settings are incomplete; chat requests will fail until they are set")
+
+    # El tokenizer (presupuesto de tokens del prompt) puede descargarse: se carga fuera del event loop
+    await asyncio.to_thread(get_encoding)
+
+    # Un prefijo del prompt fuera de límites deja de servirse desde la caché de Azure
+    for problem in await asyncio.to_thread(check_prefix_sizes):
+        logger.error(f"Prompt prefix check failed: {problem}")
+
+    # Carga la lista de precios en memoria y arranca su refresco en segundo plano
+    await price_index.start()
+
+    # Aplica las migraciones pendientes del esquema una sola vez por arranque
+    if settings.DB_MIGRATE_ON_STARTUP:
+        try:
+            await database.run(get_lead_repository().ensure_schema)
+        except Exception:
+            logger.exception("Database migration failed at startup")
+
+    # Carga el filtro de emails registrados (Bloom + set de Redis) para responder duplicados sin SQL
+    if settings.LEADS_EMAIL_FILTER_ENABLED:
+        try:
+            await database.run(get_registered_emails().load, get_lead_repository())
+        except Exception:
+            logger.exception("Could not load the registered emails filter")
+
+    # Modo write-behind: vuelca en segundo plano los leads encolados en el spool local
+    lead_flusher = None
+    if settings.LEADS_WRITE_MODE == "write_behind":
+        lead_flusher = LeadFlusher(get_lead_spool())
+        lead_flusher.start()
+    yield
+    if lead_flusher is not None:
+        await lead_flusher.stop()
+    await price_index.stop()
+    await close_async_blob_service()
+    await close_deployment_pool()
+    await close_azure_openai_client()
+    await close_rate_limiters()
+    await hedge_policy.close()
+    await answer_cache.close()
+    if settings.LEADS_EMAIL_FILTER_ENABLED:
+        get_registered_emails().close()
+    close_lead_repository()
+    database.close()
+
 
 app = FastAPI(
     title="Angel Bot API",
@@ -13,7 +87,8 @@ app = FastAPI(
     **Correo:** erikherazojimenez@outlook.com  
     **Propósito:** Automatizar respuestas inteligentes a usuarios mediante múltiples integraciones.
     """,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -0,0 +1,202 @@
+import re
+import json
+import time
+import base64
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import redis.asyncio as aioredis
+
+from app.core import constants
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.cache.redis_config import get_redis_url
+from app.services.chat.language import detect_language, normalize_message
+from app.services.chat.prompt import SYSTEM_PROMPTS
+from app.services.prices.price_index import price_index
+from app.services.cloud.azure.client import get_azure_openai_client, get_chat_config
+
+# Preguntas con datos personales (email, teléfono, números largos) nunca se cachean
+PERSONAL_DATA_PATTERN = re.compile(r"@|\d{6,}|\+\d")
+# Segundos que se reutiliza en memoria la generación leída de Redis
+GENERATION_REFRESH_SECONDS = 30
+
+
+@dataclass
+class CacheProbe:
+    """Resultado de consultar la caché para una pregunta elegible."""
+    question: str
+    normalized: str
+    language: str
+    answer: Optional[str] = None
+    embedding: Optional[list] = None
+
+
+class AnswerCache:
+    """
+    Caché de respuestas para preguntas frecuentes, en Redis con TTL.
+
+    - Solo son elegibles las preguntas de primer turno (sin historial), cortas y sin
+      datos personales; y solo se guardan respuestas que no usaron tools con estado
+      (ver `ToolSpec.cacheable`).
+    - Clave: `<prefijo>:<versión>:<idioma>:<sha1(pregunta normalizada)>`.
+    - La versión combina el etag de la lista de precios, `ANSWER_CACHE_INDEX_VERSION`
+      (índice de Azure AI Search), el prompt y un contador de generación en Redis.
+      Cualquier cambio deja de leer las entradas viejas, que expiran por TTL.
+      `python -m app.services.cache.answer_cache --invalidate` incrementa la generación.
+    - Opcional (`ANSWER_CACHE_EMBEDDINGS`): si no hay coincidencia exacta, busca la pregunta
+      cacheada más parecida por similitud coseno de embeddings.
+    Cualquier fallo de Redis o de embeddings se trata como un fallo de caché.
+    """
+
+    def __init__(self, redis_client=None, prefix: str = "answers"):
+        self.prefix = prefix
+        self._redis = redis_client
+        self._generation = None
+        self._generation_read_at = 0.0
+        prompts = constants.ASSISTANT_PROMPT + "".join(SYSTEM_PROMPTS[language] for language in sorted(SYSTEM_PROMPTS))
+        self._prompt_hash = hashlib.sha1(prompts.encode("utf-8")).hexdigest()[:8]
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = aioredis.from_url(get_redis_url(), decode_responses=True)
+        return self._redis
+
+    @property
+    def generation_key(self) -> str:
+        return f"{self.prefix}:generation"
+
+    def is_eligible(self, history: list, question: str) -> bool:
+        if not settings.ANSWER_CACHE_ENABLED or history:
+            return False
+        if not question or len(question) > settings.ANSWER_CACHE_MAX_QUESTION_CHARS:
+            return False
+        return not PERSONAL_DATA_PATTERN.search(question)
+
+    async def _version(self) -> str:
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_read_at > GENERATION_REFRESH_SECONDS:
+            self._generation = await self.redis.get(self.generation_key) or "0"
+            self._generation_read_at = now
+
+        price_etag = price_index.catalog.etag if price_index.is_loaded else "none"
+        raw = f"{self._generation}|{price_etag}|{settings.ANSWER_CACHE_INDEX_VERSION}|{self._prompt_hash}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+    def _answer_key(self, version: str, language: str, normalized: str) -> str:
+        return f"{self.prefix}:{version}:{language}:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
+
+    def _vectors_key(self, version: str, language: str) -> str:
+        return f"{self.prefix}:{version}:{language}:vectors"
+
+    async def _embed(self, text: str) -> list:
+        response = await get_azure_openai_client().embeddings.create(
+            model=get_chat_config().embedding_deployment,
+            input=text,
+        )
+        return response.data[0].embedding
+
+    async def _similar_answer(self, version: str, probe: CacheProbe) -> Optional[str]:
+        vectors = await self.redis.hgetall(self._vectors_key(version, probe.language))
+        if not vectors:
+            return None
+
+        probe.embedding = await self._embed(probe.normalized)
+        query = np.asarray(probe.embedding, dtype=np.float32)
+        fields = list(vectors)
+        matrix = np.stack([np.frombuffer(base64.b64decode(vectors[f]), dtype=np.float32) for f in fields])
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-9)
+        best = int(np.argmax(scores))
+        if scores[best] < settings.ANSWER_CACHE_SIMILARITY:
+            return None
+
+        data = await self.redis.get(f"{self.prefix}:{version}:{probe.language}:{fields[best]}")
+        if data is None:
+            return None
+        logger.info(f"🎯 Caché semántica: similitud {scores[best]:.3f} con '{json.loads(data)['question']}'")
+        return json.loads(data)["answer"]
+
+    async def lookup(self, history: list, question: str) -> Optional[CacheProbe]:
+        """
+        Consulta la caché. Retorna None si la pregunta no es elegible; si lo es, un
+        `CacheProbe` con `answer` relleno en caso de acierto (para pasarlo luego a `store`).
+        """
+        if not self.is_eligible(history, question):
+            return None
+
+        probe = CacheProbe(
+            question=question,
+            normalized=normalize_message(question),
+            language=detect_language(question),
+        )
+        if not probe.normalized:
+            return None
+
+        try:
+            version = await self._version()
+            data = await self.redis.get(self._answer_key(version, probe.language, probe.normalized))
+            if data is not None:
+                probe.answer = json.loads(data)["answer"]
+            elif settings.ANSWER_CACHE_EMBEDDINGS:
+                probe.answer = await self._similar_answer(version, probe)
+        except Exception as e:
+            logger.warning(f"⚠️ Caché de respuestas no disponible ({e}).")
+            return probe
+
+        if probe.answer is not None:
+            logger.info(f"⚡ Respuesta servida desde caché [{probe.language}]: {question}")
+        return probe
+
+    async def store(self, probe: CacheProbe, answer: str):
+        try:
+            version = await self._version()
+            key = self._answer_key(version, probe.language, probe.normalized)
+            ttl = settings.ANSWER_CACHE_TTL_SECONDS
+            payload = json.dumps({"question": probe.question, "answer": answer}, ensure_ascii=False)
+            await self.redis.set(key, payload, ex=ttl)
+
+            if settings.ANSWER_CACHE_EMBEDDINGS:
+                vectors_key = self._vectors_key(version, probe.language)
+                if await self.redis.hlen(vectors_key) < settings.ANSWER_CACHE_MAX_VECTORS:
+                    embedding = probe.embedding or await self._embed(probe.normalized)
+                    vector = base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode("ascii")
+                    await self.redis.hset(vectors_key, key.rsplit(":", 1)[1], vector)
+                    await self.redis.expire(vectors_key, ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar la respuesta en caché ({e}).")
+
+    async def invalidate(self) -> int:
+        """Invalida todas las respuestas cacheadas (p. ej. tras reindexar Azure AI Search)."""
+        generation = await self.redis.incr(self.generation_key)
+        self._generation = str(generation)
+        self._generation_read_at = time.monotonic()
+        return generation
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+answer_cache = AnswerCache()
+
+
+if __name__ == "__main__":
+    import asyncio
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gestión de la caché de respuestas.")
+    parser.add_argument("--invalidate", action="store_true", help="Invalida todas las respuestas cacheadas.")
+    args = parser.parse_args()
+
+    async def main():
+        try:
+            if args.invalidate:
+                print(f"Generación de la caché: {await answer_cache.invalidate()}")
+        finally:
+            await answer_cache.close()
+
+    asyncio.run(main())
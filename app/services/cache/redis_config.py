@@ -0,0 +1,19 @@
+import os
+
+
+def get_redis_url() -> str:
+    """
+    URL de Redis según el entorno (APP_ENV):
+      - prod: Redis Enterprise en Azure con SSL y contraseña separada.
+      - local: Redis local (docker).
+    """
+    app_env = os.getenv("APP_ENV", "local").lower()
+
+    if app_env == "prod":
+        host = os.getenv("REDIS_HOST_PROD")
+        port = os.getenv("REDIS_PORT_PROD")
+        password = os.getenv("REDIS_PASSWORD_PROD")
+        # rediss://<password>@<host>:<port>
+        return f"rediss://:{password}@{host}:{port}"
+
+    return os.getenv("REDIS_URL_LOCAL", "redis://redis_local:6379")
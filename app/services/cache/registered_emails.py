@@ -0,0 +1,140 @@
+import math
+import hashlib
+import threading
+
+import redis
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.cache.redis_config import get_redis_url
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom en memoria (bytearray + doble hashing sobre blake2b).
+    Sin falsos negativos: si `item not in filtro`, el item nunca se añadió.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        positions = self._positions(item)
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RegisteredEmails:
+    """
+    Caché negativa de emails ya registrados, para responder `already_exists` sin ir a SQL.
+
+    - El filtro de Bloom (por proceso) descarta en memoria los emails seguro nuevos.
+    - El set de Redis (`LEADS_EMAILS_REDIS_KEY`, compartido entre workers) confirma los
+      positivos, así un falso positivo del Bloom nunca se contesta como duplicado.
+    - Cualquier fallo de Redis degrada a "no se sabe" y la consulta va a SQL, que sigue
+      siendo la fuente de verdad (restricción UNIQUE).
+
+    Es síncrono: se usa desde `save_user`, que corre en el executor de base de datos.
+    Si se borran usuarios de la tabla hay que quitarlos también del set (SREM).
+    """
+
+    def __init__(self, redis_client=None, key: str = None, capacity: int = None, error_rate: float = None):
+        self.key = key or settings.LEADS_EMAILS_REDIS_KEY
+        self.ready_key = f"{self.key}:ready"
+        self.bloom = BloomFilter(
+            capacity or settings.LEADS_BLOOM_CAPACITY,
+            error_rate or settings.LEADS_BLOOM_ERROR_RATE,
+        )
+        self._redis = redis_client
+        self.ready = False
+
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                get_redis_url(),
+                decode_responses=True,
+                socket_timeout=settings.LEADS_EMAILS_REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.LEADS_EMAILS_REDIS_TIMEOUT_SECONDS,
+            )
+        return self._redis
+
+    def load(self, repository, batch_size: int = 5000) -> int:
+        """
+        Carga el filtro al arrancar. Si otro worker ya volcó la tabla en Redis (marca
+        `<key>:ready`) se lee el set; si no, se lee la base de datos y se publica en Redis.
+        Retorna el número de emails cargados.
+        """
+        try:
+            if self.redis.exists(self.ready_key):
+                for email in self.redis.sscan_iter(self.key, count=batch_size):
+                    self.bloom.add(email)
+            else:
+                for emails in repository.iter_emails(batch_size):
+                    for email in emails:
+                        self.bloom.add(email)
+                    if emails:
+                        self.redis.sadd(self.key, *emails)
+                self.redis.set(self.ready_key, 1)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Redis no disponible al cargar los emails registrados ({e}); los duplicados se resolverán en SQL.")
+            return 0
+
+        self.ready = True
+        logger.info(f"✅ Filtro de emails registrados cargado: {self.bloom.count} emails.")
+        return self.bloom.count
+
+    def is_registered(self, email: str) -> bool:
+        """True solo si el email está registrado con seguridad (Bloom positivo + confirmado en Redis)."""
+        if not self.ready or email not in self.bloom:
+            return False
+        try:
+            return bool(self.redis.sismember(self.key, email))
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Redis no respondió al comprobar '{email}' ({e}); se consulta SQL.")
+            return False
+
+    def add(self, *emails: str):
+        """Registra emails recién insertados (o confirmados como existentes por SQL)."""
+        # Sin carga inicial (Redis caído al arrancar) el filtro no se usa: no se paga el timeout
+        if not self.ready or not emails:
+            return
+        for email in emails:
+            self.bloom.add(email)
+        try:
+            self.redis.sadd(self.key, *emails)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ No se pudo actualizar el set de emails en Redis ({e}).")
+
+    def close(self):
+        if self._redis is not None:
+            self._redis.close()
+            self._redis = None
+
+
+_registered_emails = None
+_registered_emails_lock = threading.Lock()
+
+
+def get_registered_emails() -> RegisteredEmails:
+    global _registered_emails
+    if _registered_emails is None:
+        with _registered_emails_lock:
+            if _registered_emails is None:  # double-check
+                _registered_emails = RegisteredEmails()
+    return _registered_emails
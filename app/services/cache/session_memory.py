@@ -1,24 +1,15 @@
-import os
 import json
 import redis.asyncio as aioredis
+from redis.exceptions import WatchError
+
+from app.services.cache.redis_config import get_redis_url
 
 class SessionMemoryRedis:
     def __init__(self):
         self.ttl = 900  # 15 minutos por sesión
-        app_env = os.getenv("APP_ENV", "local").lower()
-
-        if app_env == "prod":
-            # Redis Enterprise en Azure con SSL y contraseña separada
-            host = os.getenv("REDIS_HOST_PROD")
-            port = os.getenv("REDIS_PORT_PROD")
-            password = os.getenv("REDIS_PASSWORD_PROD")
-            # rediss://<password>@<host>:<port>
-            self.redis_url = f"rediss://:{password}@{host}:{port}"
-            self.redis_kwargs = {"decode_responses": True}
-        else:
-            # Redis local (docker)
-            self.redis_url = os.getenv("REDIS_URL_LOCAL", "redis://redis_local:6379")
-            self.redis_kwargs = {"decode_responses": True}
+        # Redis Enterprise en Azure (prod) o Redis local (docker), según APP_ENV
+        self.redis_url = get_redis_url()
+        self.redis_kwargs = {"decode_responses": True}
 
         self.redis = None
 
@@ -38,9 +29,55 @@ class SessionMemoryRedis:
         data = await self.redis.get(f"session:{session_id}")
         return json.loads(data) if data else []
 
-    async def save_session(self, session_id: str, history: list):
+    async def get_session_state(self, session_id: str):
+        """
+        Historial, resumen de los turnos antiguos e idioma de la sesión en una sola lectura.
+        Retorna (history, summary, language); summary y language pueden ser None.
+        """
+        await self.ensure_connected()
+        data, summary, language = await self.redis.mget(
+            f"session:{session_id}", f"session:{session_id}:summary", f"session:{session_id}:language"
+        )
+        return (json.loads(data) if data else []), summary, language
+
+    async def save_session(self, session_id: str, history: list, language: str = None):
+        """Guarda el historial. Con `language`, fija el idioma de la sesión solo si aún no tenía uno."""
+        await self.ensure_connected()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.setex(f"session:{session_id}", self.ttl, json.dumps(history))
+            if language:
+                pipe.set(f"session:{session_id}:language", language, ex=self.ttl, nx=True)
+            # El resumen y el idioma viven lo mismo que el historial
+            pipe.expire(f"session:{session_id}:summary", self.ttl)
+            pipe.expire(f"session:{session_id}:language", self.ttl)
+            await pipe.execute()
+
+    async def save_language(self, session_id: str, language: str):
+        await self.ensure_connected()
+        await self.redis.setex(f"session:{session_id}:language", self.ttl, language)
+
+    async def fold_into_summary(self, session_id: str, folded: list, summary: str) -> bool:
+        """
+        Sustituye los mensajes `folded` (inicio del historial) por `summary`.
+        Si entretanto otro proceso cambió ese inicio, no hace nada y retorna False.
+        """
         await self.ensure_connected()
-        await self.redis.setex(f"session:{session_id}", self.ttl, json.dumps(history))
+        key = f"session:{session_id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                data = await pipe.get(key)
+                history = json.loads(data) if data else []
+                if history[:len(folded)] != folded:
+                    await pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.setex(key, self.ttl, json.dumps(history[len(folded):]))
+                pipe.setex(f"{key}:summary", self.ttl, summary)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
 
     async def add_message(self, session_id: str, role: str, content: str):
         history = await self.get_session(session_id)
@@ -49,4 +86,4 @@ class SessionMemoryRedis:
 
     async def clear_session(self, session_id: str):
         await self.ensure_connected()
-        await self.redis.delete(f"session:{session_id}")
+        await self.redis.delete(f"session:{session_id}", f"session:{session_id}:summary", f"session:{session_id}:language")
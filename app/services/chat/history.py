@@ -0,0 +1,44 @@
+from app.services.chat.tokens import count_message_tokens
+
+SUMMARY_HEADER = "Resumen de la conversación anterior con este usuario:\n"
+
+
+def history_tokens(history: list) -> int:
+    return sum(count_message_tokens(message) for message in history)
+
+
+def trim_to_budget(history: list, max_tokens: int) -> list:
+    """
+    Keep the most recent messages that fit in `max_tokens`.
+    History is stored as user/assistant pairs, so whole turns are dropped from the front.
+    """
+    kept = []
+    used = 0
+    for start in range(len(history) - 2, -1, -2):
+        turn = history[start:start + 2]
+        cost = history_tokens(turn)
+        if used + cost > max_tokens:
+            break
+        kept[:0] = turn
+        used += cost
+    return kept
+
+
+def split_for_summary(history: list, max_tokens: int, keep_messages: int):
+    """
+    Split `history` into (to_summarize, to_keep) when it exceeds `max_tokens`.
+    The last `keep_messages` messages stay verbatim; returns ([], history) when within budget.
+    """
+    keep_messages += keep_messages % 2
+    if history_tokens(history) <= max_tokens or len(history) <= keep_messages:
+        return [], history
+    cut = len(history) - keep_messages
+    return history[:cut], history[cut:]
+
+
+def summary_message(summary: str) -> dict:
+    return {"role": "system", "content": SUMMARY_HEADER + summary}
+
+
+def render_transcript(messages: list) -> str:
+    return "\n".join(f"{message['role']}: {message.get('content') or ''}" for message in messages)
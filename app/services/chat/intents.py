@@ -0,0 +1,188 @@
+"""
+Local intent fast path: greetings, thanks and closings are answered from
+templates, without calling the model.
+
+A message qualifies only if it is short and every word belongs to a known
+phrase ("hola", "muchas gracias", "ok gracias adiós"). Anything else, such as
+"hola, ¿cuánto cuesta el botox?", goes to the model as usual.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core import constants
+from app.services.chat.language import detect_language, normalize_message
+
+GREETING = "greeting"
+THANKS = "thanks"
+CLOSING = "closing"
+
+# When a message mixes intents, the later stage of the conversation wins
+INTENT_PRIORITY = (CLOSING, THANKS, GREETING)
+
+MAX_WORDS = 6
+
+EXTRA_GREETINGS = {
+    "en": ["good morning", "good afternoon", "good evening", "hello there", "hiya"],
+    "es": ["buenos dias", "buenas tardes", "buenas noches", "que tal", "hola que tal"],
+    "fr": ["bonsoir"],
+    "de": ["guten morgen", "guten abend", "servus", "moin"],
+    "it": ["buonasera"],
+    "pt": ["ola", "oi", "bom dia", "boa tarde", "boa noite"],
+    "ca": ["bon dia", "bona tarda", "bona nit"],
+    "nl": ["hallo", "hoi", "goedemorgen", "goedemiddag", "goedenavond"],
+}
+
+THANKS_PHRASES = {
+    "en": ["thanks", "thank you", "thank you very much", "thanks a lot", "many thanks", "thx", "ty"],
+    "es": ["gracias", "muchas gracias", "mil gracias", "muchisimas gracias", "te lo agradezco"],
+    "fr": ["merci", "merci beaucoup", "merci bien"],
+    "de": ["danke", "danke schon", "vielen dank", "dankeschon"],
+    "it": ["grazie", "grazie mille", "molte grazie"],
+    "pt": ["obrigado", "obrigada", "muito obrigado", "muito obrigada"],
+    "ca": ["merci", "moltes gracies", "gracies"],
+    "nl": ["dank je", "dank u", "bedankt", "dank je wel", "dank u wel"],
+}
+
+CLOSING_PHRASES = {
+    "en": ["bye", "goodbye", "bye bye", "see you", "see you soon", "have a nice day", "thats all", "that is all"],
+    "es": ["adios", "chao", "chau", "hasta luego", "hasta pronto", "hasta manana", "nos vemos", "eso es todo", "buen dia"],
+    "fr": ["au revoir", "a bientot", "bonne journee", "a plus", "c est tout"],
+    "de": ["tschuss", "auf wiedersehen", "bis bald", "schonen tag", "das wars"],
+    "it": ["arrivederci", "a presto", "buona giornata"],
+    "pt": ["tchau", "ate logo", "ate mais", "adeus"],
+    "ca": ["adeu", "fins aviat", "fins despres", "bon dia"],
+    "nl": ["doei", "tot ziens", "fijne dag"],
+}
+
+# Acknowledgement words that may surround a phrase ("ok, gracias", "vale perfecto, adiós")
+FILLER_WORDS = {
+    "ok", "okay", "okey", "vale", "perfecto", "genial", "super", "listo", "bien", "si",
+    "yes", "great", "perfect", "cool", "nice", "d accord", "parfait", "gut", "perfetto",
+    "otimo", "perfeito", "oke", "prima", "a", "and", "y", "e", "et", "und", "en", "todo", "ya",
+}
+
+TEMPLATES = {
+    GREETING: {
+        "es": "👋 ¡Hola! Soy Aesthea, el asistente virtual de Antiaging Group Barcelona, tu clínica de medicina y cirugía estética. ¿En qué puedo ayudarte?",
+        "en": "👋 Hello! I'm Aesthea, the virtual assistant of Antiaging Group Barcelona, your aesthetic medicine and surgery clinic. How can I help you?",
+        "fr": "👋 Bonjour ! Je suis Aesthea, l'assistante virtuelle d'Antiaging Group Barcelona, votre clinique de médecine et chirurgie esthétique. Comment puis-je vous aider ?",
+        "de": "👋 Hallo! Ich bin Aesthea, die virtuelle Assistentin von Antiaging Group Barcelona, Ihrer Klinik für ästhetische Medizin und Chirurgie. Wie kann ich Ihnen helfen?",
+        "it": "👋 Ciao! Sono Aesthea, l'assistente virtuale di Antiaging Group Barcelona, la tua clinica di medicina e chirurgia estetica. Come posso aiutarti?",
+        "pt": "👋 Olá! Sou a Aesthea, a assistente virtual da Antiaging Group Barcelona, a sua clínica de medicina e cirurgia estética. Como posso ajudar?",
+        "ca": "👋 Hola! Sóc l'Aesthea, l'assistent virtual d'Antiaging Group Barcelona, la teva clínica de medicina i cirurgia estètica. En què et puc ajudar?",
+        "nl": "👋 Hallo! Ik ben Aesthea, de virtuele assistent van Antiaging Group Barcelona, uw kliniek voor esthetische geneeskunde en chirurgie. Hoe kan ik u helpen?",
+    },
+    THANKS: {
+        "es": "¡De nada! 😊 ¿Necesitas más información sobre algún tratamiento?",
+        "en": "You're welcome! 😊 Do you need more information about any treatment?",
+        "fr": "Avec plaisir ! 😊 Avez-vous besoin d'autres informations sur un traitement ?",
+        "de": "Gern geschehen! 😊 Brauchen Sie weitere Informationen zu einer Behandlung?",
+        "it": "Prego! 😊 Hai bisogno di altre informazioni su qualche trattamento?",
+        "pt": "De nada! 😊 Precisa de mais informações sobre algum tratamento?",
+        "ca": "De res! 😊 Necessites més informació sobre algun tractament?",
+        "nl": "Graag gedaan! 😊 Heeft u meer informatie nodig over een behandeling?",
+    },
+    CLOSING: {
+        "es": "¡Gracias por escribirnos! Si necesitas más información, aquí estaré. ¡Que tengas un buen día! 👋",
+        "en": "Thank you for contacting us! If you need more information, I'll be here. Have a great day! 👋",
+        "fr": "Merci de nous avoir contactés ! Si vous avez besoin d'autres informations, je suis là. Bonne journée ! 👋",
+        "de": "Danke für Ihre Nachricht! Wenn Sie weitere Informationen brauchen, bin ich für Sie da. Einen schönen Tag! 👋",
+        "it": "Grazie per averci scritto! Se hai bisogno di altre informazioni, sono qui. Buona giornata! 👋",
+        "pt": "Obrigado por nos contactar! Se precisar de mais informações, estarei aqui. Tenha um bom dia! 👋",
+        "ca": "Gràcies per escriure'ns! Si necessites més informació, aquí em tindràs. Que tinguis un bon dia! 👋",
+        "nl": "Bedankt voor uw bericht! Als u meer informatie nodig heeft, ben ik er. Een fijne dag! 👋",
+    },
+}
+
+# Tie-break between languages that share a phrase ("hallo", "merci", "hi"): the clinic's main audiences first
+LANGUAGE_PREFERENCE = ("es", "en", "fr", "ca", "de", "it", "pt", "nl")
+
+
+def _build_lexicon() -> dict:
+    """normalized phrase (tuple of words) -> {intent: set(languages)}, restricted to languages with templates."""
+    sources = {
+        GREETING: [constants.GREETINGS_BY_LANGUAGE, EXTRA_GREETINGS],
+        THANKS: [THANKS_PHRASES],
+        CLOSING: [CLOSING_PHRASES],
+    }
+    lexicon = {}
+    for intent, tables in sources.items():
+        for table in tables:
+            for language, phrases in table.items():
+                if language not in TEMPLATES[intent]:
+                    continue
+                for phrase in phrases:
+                    words = tuple(normalize_message(phrase).split())
+                    if words:
+                        lexicon.setdefault(words, {}).setdefault(intent, set()).add(language)
+    return lexicon
+
+
+LEXICON = _build_lexicon()
+MAX_PHRASE_WORDS = max(len(words) for words in LEXICON)
+FILLER = {tuple(normalize_message(word).split()) for word in FILLER_WORDS}
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    language: str
+    reply: str
+
+
+def _segment(words: list):
+    """
+    Cover the whole message with lexicon phrases and filler words (longest match first).
+    Returns the list of matched {intent: languages} entries, or None if any word is unknown.
+    """
+    matches = []
+    i = 0
+    while i < len(words):
+        for size in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+            chunk = tuple(words[i:i + size])
+            if chunk in LEXICON:
+                matches.append(LEXICON[chunk])
+                break
+            if chunk in FILLER:
+                break
+        else:
+            return None
+        i += size
+    return matches
+
+
+def _pick_language(candidates: set, text: str) -> str:
+    detected = detect_language(text, default="")
+    if detected in candidates:
+        return detected
+    return next((language for language in LANGUAGE_PREFERENCE if language in candidates), sorted(candidates)[0])
+
+
+def classify_intent(text: str) -> Optional[Intent]:
+    """
+    Recognize a bare greeting, thanks or closing and build its template reply.
+    Returns None for anything else (the message then goes to the model).
+    """
+    words = normalize_message(text or "").split()
+    if not words or len(words) > MAX_WORDS:
+        return None
+
+    matches = _segment(words)
+    if not matches:
+        return None
+
+    found = {}
+    for match in matches:
+        for intent, languages in match.items():
+            found.setdefault(intent, set()).update(languages)
+
+    # A phrase may belong to several intents ("bon dia" is a greeting and a closing in Catalan)
+    intent = next(name for name in INTENT_PRIORITY if name in found)
+    if intent == CLOSING and len(matches) == 1 and GREETING in matches[0]:
+        intent = GREETING
+
+    # Languages shared by every matched phrase; otherwise those of the chosen intent
+    common = set.intersection(*(set().union(*match.values()) for match in matches))
+    candidates = (common & found[intent]) or found[intent]
+    language = _pick_language(candidates, text)
+    return Intent(name=intent, language=language, reply=TEMPLATES[intent][language])
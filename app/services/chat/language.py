@@ -0,0 +1,59 @@
+import re
+import unicodedata
+from typing import Optional
+
+from langdetect import DetectorFactory, LangDetectException, detect_langs
+
+# Deterministic results: langdetect is randomized unless seeded.
+DetectorFactory.seed = 0
+
+DEFAULT_LANGUAGE = "en"
+MIN_CONFIDENCE = 0.70
+# Shorter messages are too ambiguous to set or change a session's language ("hola" -> cy)
+MIN_WORDS_TO_DETECT = 3
+MIN_WORDS_TO_SWITCH = 5
+
+
+def detect_language(text: str, default: str = DEFAULT_LANGUAGE) -> str:
+    """
+    Detect the ISO 639-1 language code of `text` ("es", "en", "zh", ...).
+
+    Regional variants are folded ("zh-cn" -> "zh"). Returns `default` for empty
+    text or when the detector is not confident enough, which is common for
+    one- or two-word messages.
+    """
+    if not text or not text.strip():
+        return default
+    try:
+        candidates = detect_langs(text)
+    except LangDetectException:
+        return default
+    if not candidates or candidates[0].prob < MIN_CONFIDENCE:
+        return default
+    return candidates[0].lang.split("-")[0]
+
+
+def resolve_language(text: str, current: Optional[str] = None, supported=None) -> Optional[str]:
+    """
+    Language of a conversation after a new message: the detected language if the
+    message is long enough (and, if given, in `supported`), otherwise `current`.
+    Switching away from an established language takes a longer message.
+    """
+    words = len((text or "").split())
+    if words < (MIN_WORDS_TO_SWITCH if current else MIN_WORDS_TO_DETECT):
+        return current
+    detected = detect_language(text, default=None)
+    if detected is None or (supported is not None and detected not in supported):
+        return current
+    return detected
+
+
+def normalize_message(text: str) -> str:
+    """
+    Casefold, strip accents and punctuation, and collapse whitespace.
+    Unlike `normalize_text` (prices), any script is kept, so "你好" stays matchable.
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
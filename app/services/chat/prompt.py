@@ -0,0 +1,105 @@
+"""
+Static prompt prefix shared by every chat call: tool definitions and system prompt.
+
+Azure OpenAI caches prompts by prefix (at least 1024 identical tokens, then in
+128-token steps), so this part must stay byte-identical between calls and come
+before anything that varies per session (summary, history, question).
+
+Each language in `constants.LANGUAGE_NAMES` has its own precompiled system prompt:
+the multilingual greeting table and the translate-yourself rules are replaced by
+one instruction for that language. `ASSISTANT_PROMPT` (multilingual) is used while
+the session language is unknown. Every variant is a stable prefix of its own.
+
+Size check, for CI or before changing the prompt:
+
+    python -m app.services.chat.prompt [--max-tokens N]
+
+It exits with status 1 when a prefix is larger than the limit or too small to be
+cached. `test_prompt_size` runs the same check, and the app logs an error at startup
+when it fails.
+"""
+from functools import lru_cache
+
+from app.core import constants
+from app.core.config import settings
+from app.services.tools import tool_registry
+from app.services.chat.tokens import REPLY_PRIMING_TOKENS, count_messages_tokens, count_tools_tokens, get_encoding
+
+# Minimum prefix length that Azure OpenAI serves from its prompt cache
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+def build_language_prompt(language: str) -> str:
+    name = constants.LANGUAGE_NAMES[language]
+    greetings = constants.GREETINGS_BY_LANGUAGE.get(language)
+    language_rule = (
+        f"IMPORTANTE: Responde SIEMPRE en {name}. "
+        f"Si el usuario escribe en otro idioma, responde en el idioma del usuario.\n"
+    )
+    greetings_line = f"Saludos habituales en {name}: {', '.join(greetings)}.\n" if greetings else ""
+    return (
+        constants.PROMPT_INTRO + language_rule + constants.PROMPT_ROLE + greetings_line
+        + constants.PROMPT_RULES_HEAD + constants.PROMPT_RULES
+    )
+
+
+SYSTEM_PROMPTS = {language: build_language_prompt(language) for language in constants.LANGUAGE_NAMES}
+
+
+def system_prompt(language: str = None) -> str:
+    """Slim prompt for a supported language; the multilingual prompt otherwise."""
+    return SYSTEM_PROMPTS.get(language, constants.ASSISTANT_PROMPT)
+
+
+def system_message(language: str = None) -> dict:
+    return {"role": "system", "content": system_prompt(language)}
+
+
+@lru_cache(maxsize=None)
+def prefix_tokens(language: str = None) -> int:
+    """Tokens of the static prefix (system prompt + tools), counted once per process and language."""
+    return count_messages_tokens([system_message(language)]) - REPLY_PRIMING_TOKENS + count_tools_tokens(tool_registry.schemas)
+
+
+def check_prefix_sizes(max_tokens: int = None) -> list:
+    """
+    Problems with the static prefixes (multilingual and per language): larger than
+    `max_tokens` (default `OPENAI_PROMPT_PREFIX_MAX_TOKENS`) or smaller than
+    `PROMPT_CACHE_MIN_TOKENS`, where Azure stops caching them. Empty when all fit.
+    """
+    max_tokens = max_tokens or settings.OPENAI_PROMPT_PREFIX_MAX_TOKENS
+    sizes = {"multilingual": prefix_tokens()}
+    sizes.update((language, prefix_tokens(language)) for language in SYSTEM_PROMPTS)
+
+    problems = []
+    for name, tokens in sizes.items():
+        if tokens > max_tokens:
+            problems.append(f"{name} prefix is {tokens} tokens, above the {max_tokens} limit")
+        elif tokens < PROMPT_CACHE_MIN_TOKENS:
+            problems.append(f"{name} prefix is {tokens} tokens, below the {PROMPT_CACHE_MIN_TOKENS} Azure needs to cache it")
+    return problems
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Token size of the static prompt prefix.")
+    parser.add_argument("--max-tokens", type=int, default=settings.OPENAI_PROMPT_PREFIX_MAX_TOKENS)
+    args = parser.parse_args()
+
+    tools_tokens = count_tools_tokens(tool_registry.schemas)
+    total = prefix_tokens()
+    slim = {language: prefix_tokens(language) for language in SYSTEM_PROMPTS}
+    smallest, largest = min(slim, key=slim.get), max(slim, key=slim.get)
+
+    print(f"tokenizer: {settings.OPENAI_TOKENIZER_ENCODING}" + ("" if get_encoding() is not None else " (unavailable, length-based estimate)"))
+    print(f"tools: {tools_tokens} tokens ({len(tool_registry.schemas)} definitions)")
+    print(f"multilingual prefix: {total} / {args.max_tokens} tokens ({len(constants.ASSISTANT_PROMPT)} chars of system prompt)")
+    print(f"per-language prefix: {slim[smallest]} ({smallest}) to {slim[largest]} ({largest}) tokens, {len(slim)} languages")
+    problems = check_prefix_sizes(args.max_tokens)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
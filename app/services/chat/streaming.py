@@ -0,0 +1,27 @@
+import re
+
+# End of a sentence: terminal punctuation followed by whitespace, or a line break.
+SENTENCE_BOUNDARY = re.compile(r"[.!?…:;]+[\"')\]]*\s+|\n+")
+
+
+async def iter_sentences(deltas, min_chars: int = 40):
+    """
+    Regroup streamed text deltas into chunks that end at a sentence boundary.
+
+    A chunk is emitted once the buffer holds at least `min_chars` characters up to
+    its last boundary, so short fragments ("Dr. ", "Hola. ") are merged with the
+    following sentence. Whatever is left when the stream ends is emitted as-is.
+    Joining every chunk gives back the full text.
+    """
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+        last_boundary = None
+        for match in SENTENCE_BOUNDARY.finditer(buffer):
+            last_boundary = match
+        if last_boundary is not None and last_boundary.end() >= min_chars:
+            yield buffer[:last_boundary.end()]
+            buffer = buffer[last_boundary.end():]
+
+    if buffer:
+        yield buffer
@@ -0,0 +1,27 @@
+"""
+Regression check for the static prompt prefix: every variant (multilingual and per
+language) must stay within `OPENAI_PROMPT_PREFIX_MAX_TOKENS` and above the minimum
+Azure needs to cache it. Run it after any change to the prompt or the tools:
+
+    python -m app.services.chat.test_prompt_size
+
+Exits with status 1 when a prefix is out of bounds.
+"""
+import sys
+
+from app.core.config import settings
+from app.services.chat.prompt import check_prefix_sizes, prefix_tokens
+
+
+def main() -> int:
+    problems = check_prefix_sizes()
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return 1
+    print(f"✅ Prompt prefix OK: {prefix_tokens()} / {settings.OPENAI_PROMPT_PREFIX_MAX_TOKENS} tokens (multilingual)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import json
+import math
+import threading
+from functools import lru_cache
+
+import tiktoken
+
+from app.core.config import settings
+from app.core.logging_config import logger
+
+# Fixed overhead per chat message (role and separators) and for priming the reply,
+# as documented for the chat completions format.
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING_TOKENS = 3
+# Used when the encoding cannot be loaded; errs on the high side for Latin text.
+FALLBACK_CHARS_PER_TOKEN = 3
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """
+    Tokenizer for `OPENAI_TOKENIZER_ENCODING`, loaded once.
+
+    tiktoken downloads the encoding file on first use (set TIKTOKEN_CACHE_DIR to
+    ship it with the image). If it cannot be loaded, returns None and token counts
+    fall back to a character-based estimate.
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    _encoding = tiktoken.get_encoding(settings.OPENAI_TOKENIZER_ENCODING)
+                except Exception as e:
+                    logger.warning(f"⚠️ Tokenizer {settings.OPENAI_TOKENIZER_ENCODING} unavailable ({e}); estimating tokens from length.")
+                _encoding_loaded = True
+    return _encoding
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Cached: the system prompt and history messages are counted again on every turn."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Keep the beginning of `text` up to `max_tokens` tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * FALLBACK_CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def count_message_tokens(message: dict) -> int:
+    tokens = TOKENS_PER_MESSAGE + count_tokens(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        tokens += count_tokens(function.get("name", "")) + count_tokens(function.get("arguments", ""))
+    return tokens
+
+
+def count_messages_tokens(messages: list) -> int:
+    return sum(count_message_tokens(message) for message in messages) + REPLY_PRIMING_TOKENS
+
+
+def count_tools_tokens(schemas: list) -> int:
+    """Approximate cost of the `tools` definitions (the API renders them into the prompt)."""
+    return count_tokens(json.dumps(schemas, ensure_ascii=False)) if schemas else 0
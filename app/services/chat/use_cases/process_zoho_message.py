@@ -1,5 +1,9 @@
 import logging
 
+from fastapi import HTTPException
+
+from app.services.chat.streaming import iter_sentences
+
 logger = logging.getLogger(__name__)
 
 FALLBACK_MESSAGE = (
@@ -14,6 +18,8 @@ async def process_zoho_message(
     session_id: str,
     user_question: str,
     rag_runner,
+    stream: bool = False,
+    min_progress_chars: int = 40,
 ):
     logger.info(
         "Processing Zoho message",
@@ -28,7 +34,15 @@ async def process_zoho_message(
 
     # 2) Generate answer (RAG)
     try:
-        answer = await rag_runner(session_id, user_question)
+        if stream:
+            answer = await stream_answer(
+                zoho_client=zoho_client,
+                request_id=request_id,
+                deltas=rag_runner(session_id, user_question, stream=True),
+                min_progress_chars=min_progress_chars,
+            )
+        else:
+            answer = await rag_runner(session_id, user_question)
     except Exception:
         logger.exception("RAG failed", extra={"request_id": request_id})
     
@@ -48,3 +62,26 @@ async def process_zoho_message(
         "Zoho response completed",
         extra={"request_id": request_id},
     )
+
+
+async def stream_answer(*, zoho_client, request_id: str, deltas, min_progress_chars: int) -> str:
+    """
+    Push the answer to Zoho as progress messages, one per group of complete
+    sentences, while it is being generated. Returns the full answer text.
+    A failed progress push is logged and does not interrupt the answer.
+    """
+    chunks = []
+    async for chunk in iter_sentences(deltas, min_chars=min_progress_chars):
+        chunks.append(chunk)
+        if not chunk.strip():
+            continue
+        try:
+            await zoho_client.send_progress_update(request_id=request_id, text=chunk.strip())
+        except HTTPException:
+            logger.warning("Zoho partial progress failed", extra={"request_id": request_id})
+
+    logger.info(
+        "Zoho streamed answer",
+        extra={"request_id": request_id, "chunks": len(chunks)},
+    )
+    return "".join(chunks)
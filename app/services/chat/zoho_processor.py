@@ -3,6 +3,7 @@ import logging
 
 from dotenv import load_dotenv
 
+from app.core.config import settings
 from app.services.zoho.client import ZohoClient
 from app.services.cloud.azure.azure_openai import run_conversation_with_rag
 from app.services.chat.use_cases.process_zoho_message import process_zoho_message
@@ -22,6 +23,8 @@ async def process_message_async(request_id: str, session_id: str, user_question:
             session_id=session_id,
             user_question=user_question,
             rag_runner=run_conversation_with_rag,
+            stream=settings.ZOHO_STREAM_RESPONSES,
+            min_progress_chars=settings.ZOHO_PROGRESS_MIN_CHARS,
         )
     except Exception as e:
         logger.exception(
@@ -1,8 +1,11 @@
 import io
 import pandas as pd
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
 from azure.storage.blob import BlobServiceClient
 from app.core.config import settings
 from app.core.logging_config import logger
+from app.services.cloud.azure.blob_cache import get_blob_cache, read_through
 
 
 class AzureBlobService:
@@ -22,15 +25,69 @@ class AzureBlobService:
         blob_name = blob_name or settings.PRICE_LIST_BLOB
 
         try:
-            blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-            stream = blob_client.download_blob()
-            df = pd.read_csv(io.BytesIO(stream.readall()))
+            content, _ = self.read_blob_cached(container_name, blob_name)
+            df = pd.read_csv(io.BytesIO(content))
             logger.info(f"✅ CSV '{blob_name}' cargado correctamente desde Blob Storage.")
             return df
         except Exception as e:
             logger.error(f"❌ Error leyendo CSV desde Blob Storage: {e}")
             raise
 
+    def read_blob_cached(self, container_name=None, blob_name=None):
+        """
+        Lee el blob a través de la caché local en disco: revalida con If-None-Match y,
+        si Azure está lento o caído, sirve la última copia conocida.
+        Retorna una tupla (contenido, CacheEntry).
+        """
+        container_name = container_name or settings.PRICE_LIST_CONTAINER
+        blob_name = blob_name or settings.PRICE_LIST_BLOB
+
+        def fetch(etag):
+            return self.download_blob_if_modified(
+                container_name,
+                blob_name,
+                etag=etag,
+                read_timeout=settings.BLOB_CACHE_TIMEOUT_SECONDS if etag else None,
+            )
+
+        return read_through(get_blob_cache(), f"{container_name}/{blob_name}", fetch)
+
+    def get_blob_properties(self, container_name=None, blob_name=None):
+        """Retorna las propiedades del blob (etag, last_modified, size) sin descargar su contenido."""
+        container_name = container_name or settings.PRICE_LIST_CONTAINER
+        blob_name = blob_name or settings.PRICE_LIST_BLOB
+
+        try:
+            blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+            return blob_client.get_blob_properties()
+        except Exception as e:
+            logger.error(f"❌ Error leyendo propiedades del blob '{blob_name}': {e}")
+            raise
+
+    def download_blob_if_modified(self, container_name=None, blob_name=None, etag=None, read_timeout=None):
+        """
+        Descarga el blob solo si su ETag es distinto de `etag` (GET condicional, un único round-trip).
+        Retorna una tupla (contenido, properties) o None si el blob no ha cambiado.
+        """
+        container_name = container_name or settings.PRICE_LIST_CONTAINER
+        blob_name = blob_name or settings.PRICE_LIST_BLOB
+
+        try:
+            blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+            kwargs = {"read_timeout": read_timeout} if read_timeout else {}
+            if etag:
+                stream = blob_client.download_blob(etag=etag, match_condition=MatchConditions.IfModified, **kwargs)
+            else:
+                stream = blob_client.download_blob(**kwargs)
+            content = stream.readall()
+            logger.info(f"✅ Blob '{blob_name}' descargado (etag={stream.properties.etag}).")
+            return content, stream.properties
+        except ResourceNotModifiedError:
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error descargando blob '{blob_name}': {e}")
+            raise
+
     # === CREATE/UPDATE ===
     def upload_blob(self, container_name, blob_name, file_path):
         try:
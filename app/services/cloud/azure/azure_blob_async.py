@@ -0,0 +1,215 @@
+import io
+import os
+import shutil
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+from azure.storage.blob.aio import BlobServiceClient
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.cloud.azure.blob_cache import get_blob_cache, read_through_async
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class AsyncAzureBlobService:
+    """
+    Variante asíncrona de `AzureBlobService` sobre `azure.storage.blob.aio`.
+
+    Mantiene un único `BlobServiceClient` por proceso (ver `get_async_blob_service`), de modo
+    que las conexiones HTTP se reutilizan entre lecturas. Las descargas se consumen por
+    chunks (`download_blob().chunks()`) para no necesitar una copia completa con `readall()`.
+    """
+
+    def __init__(self, connection_string=None):
+        try:
+            self.blob_service_client = BlobServiceClient.from_connection_string(
+                connection_string or settings.AZURE_BLOB_CONNECTION_STRING,
+                max_single_get_size=CHUNK_SIZE,
+                max_chunk_get_size=CHUNK_SIZE,
+            )
+            logger.info("✅ Cliente asíncrono de Azure Blob Storage creado.")
+        except Exception as e:
+            logger.error(f"❌ Error creando el cliente asíncrono de Azure Blob Storage: {e}")
+            raise
+
+    def _blob_client(self, container_name=None, blob_name=None):
+        return self.blob_service_client.get_blob_client(
+            container=container_name or settings.PRICE_LIST_CONTAINER,
+            blob=blob_name or settings.PRICE_LIST_BLOB,
+        )
+
+    async def _download(self, container_name=None, blob_name=None, etag=None):
+        blob_client = self._blob_client(container_name, blob_name)
+        if etag:
+            return await blob_client.download_blob(etag=etag, match_condition=MatchConditions.IfModified)
+        return await blob_client.download_blob()
+
+    # === READ ===
+    async def get_blob_properties(self, container_name=None, blob_name=None):
+        return await self._blob_client(container_name, blob_name).get_blob_properties()
+
+    async def stream_blob(self, container_name=None, blob_name=None):
+        """Itera el contenido del blob por chunks sin cargarlo entero en memoria."""
+        stream = await self._download(container_name, blob_name)
+        async for chunk in stream.chunks():
+            yield chunk
+
+    async def download_blob_if_modified(self, container_name=None, blob_name=None, etag=None):
+        """
+        Descarga el blob solo si su ETag es distinto de `etag`.
+        Retorna una tupla (contenido, properties) o None si el blob no ha cambiado.
+        """
+        try:
+            stream = await self._download(container_name, blob_name, etag)
+        except ResourceNotModifiedError:
+            return None
+
+        # Un solo buffer: `getvalue()` devuelve sus bytes sin una segunda copia del blob
+        buffer = io.BytesIO()
+        await stream.readinto(buffer)
+        return buffer.getvalue(), stream.properties
+
+    async def read_blob_cached(self, container_name=None, blob_name=None):
+        """
+        Lee el blob a través de la caché local en disco (ver `AzureBlobService.read_blob_cached`).
+        Retorna una tupla (contenido, CacheEntry).
+        """
+        return await _read_blob_cached(self, container_name, blob_name)
+
+    async def download_to_file(self, path, container_name=None, blob_name=None, etag=None):
+        """
+        Vuelca el blob a `path` chunk a chunk. Retorna sus properties o None si no ha cambiado.
+        """
+        try:
+            stream = await self._download(container_name, blob_name, etag)
+        except ResourceNotModifiedError:
+            return None
+
+        with open(path, "wb") as f:
+            async for chunk in stream.chunks():
+                f.write(chunk)
+        logger.info(f"✅ Blob '{stream.name}' descargado en '{path}' (etag={stream.properties.etag}).")
+        return stream.properties
+
+    # === CREATE/UPDATE ===
+    async def upload_blob(self, container_name, blob_name, file_path):
+        blob_client = self._blob_client(container_name, blob_name)
+        with open(file_path, "rb") as data:
+            await blob_client.upload_blob(data, overwrite=True)
+        logger.info(f"✅ Archivo '{blob_name}' subido exitosamente al contenedor '{container_name}'.")
+
+    async def close(self):
+        await self.blob_service_client.close()
+
+
+@dataclass
+class LocalBlobProperties:
+    name: str
+    etag: str
+    last_modified: datetime
+    size: int
+
+
+class LocalBlobService:
+    """
+    Backend de sistema de archivos con la misma API que `AsyncAzureBlobService`,
+    para desarrollo y pruebas sin conexión (`BLOB_BACKEND=local`).
+    Cada contenedor es un subdirectorio de `BLOB_LOCAL_ROOT`; el ETag se deriva del mtime y el tamaño.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or settings.BLOB_LOCAL_ROOT
+
+    def _path(self, container_name=None, blob_name=None) -> str:
+        return os.path.join(
+            self.root,
+            container_name or settings.PRICE_LIST_CONTAINER,
+            blob_name or settings.PRICE_LIST_BLOB,
+        )
+
+    def _properties(self, path: str) -> LocalBlobProperties:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"Blob no encontrado: {path}")
+        return LocalBlobProperties(
+            name=os.path.basename(path),
+            etag=f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            last_modified=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            size=stat.st_size,
+        )
+
+    # === READ ===
+    async def get_blob_properties(self, container_name=None, blob_name=None):
+        return self._properties(self._path(container_name, blob_name))
+
+    async def stream_blob(self, container_name=None, blob_name=None):
+        path = self._path(container_name, blob_name)
+        self._properties(path)
+        with open(path, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, CHUNK_SIZE):
+                yield chunk
+
+    async def download_blob_if_modified(self, container_name=None, blob_name=None, etag=None):
+        path = self._path(container_name, blob_name)
+        properties = self._properties(path)
+        if etag and etag == properties.etag:
+            return None
+        with open(path, "rb") as f:
+            return await asyncio.to_thread(f.read), properties
+
+    async def read_blob_cached(self, container_name=None, blob_name=None):
+        return await _read_blob_cached(self, container_name, blob_name)
+
+    async def download_to_file(self, path, container_name=None, blob_name=None, etag=None):
+        source = self._path(container_name, blob_name)
+        properties = self._properties(source)
+        if etag and etag == properties.etag:
+            return None
+        await asyncio.to_thread(shutil.copyfile, source, path)
+        return properties
+
+    # === CREATE/UPDATE ===
+    async def upload_blob(self, container_name, blob_name, file_path):
+        path = self._path(container_name, blob_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        await asyncio.to_thread(shutil.copyfile, file_path, path)
+
+    async def close(self):
+        pass
+
+
+async def _read_blob_cached(service, container_name=None, blob_name=None):
+    container_name = container_name or settings.PRICE_LIST_CONTAINER
+    blob_name = blob_name or settings.PRICE_LIST_BLOB
+
+    def fetch(etag):
+        return service.download_blob_if_modified(container_name, blob_name, etag=etag)
+
+    return await read_through_async(get_blob_cache(), f"{container_name}/{blob_name}", fetch)
+
+
+_async_blob_service = None
+
+
+def get_async_blob_service():
+    """Retorna el servicio de blobs asíncrono compartido por el proceso (según `BLOB_BACKEND`)."""
+    global _async_blob_service
+    if _async_blob_service is None:
+        if settings.BLOB_BACKEND == "local":
+            _async_blob_service = LocalBlobService()
+        else:
+            _async_blob_service = AsyncAzureBlobService()
+    return _async_blob_service
+
+
+async def close_async_blob_service():
+    global _async_blob_service
+    if _async_blob_service is not None:
+        await _async_blob_service.close()
+        _async_blob_service = None
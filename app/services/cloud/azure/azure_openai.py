@@ -1,188 +1,546 @@
-import os
-import json
+import time
 import random
 import asyncio
-from azure.core.exceptions import HttpResponseError
+import openai
+from openai.types.chat import ChatCompletionMessageToolCall
 
 from app.core import constants
-from app.services.cloud.azure import azure_tools
-from app.services.cloud.azure.client import get_azure_openai_client
+from app.core.config import settings
+from app.services.tools import tool_registry
+from app.services.chat.intents import classify_intent
+from app.services.chat.language import resolve_language
+from app.services.chat import history as chat_history
+from app.services.chat import prompt
+from app.services.chat.tokens import count_messages_tokens, count_tokens, count_tools_tokens, truncate_tokens
+from app.services.cache.answer_cache import answer_cache
+from app.services.cloud.azure.deployments import get_deployment_pool
+from app.services.cloud.azure.usage import usage_stats
+from app.services.cloud.azure.rate_limiter import retry_after_seconds
+from app.services.cloud.azure.hedging import hedge_policy, race
 from app.core.logging_config import logger
 
 from app.services.cache.session_memory import SessionMemoryRedis
 
 session_memory = SessionMemoryRedis()
-MAX_HISTORY = 6
+# Tope de seguridad de mensajes guardados, además del presupuesto de tokens
+MAX_HISTORY_MESSAGES = 40
+# Resúmenes en curso (por sesión) y referencias a sus tareas para que no las recoja el GC
+_summaries_in_progress = set()
+_background_tasks = set()
+
+SUMMARY_PROMPT = (
+    "Resume la conversación entre un usuario y el asistente virtual de la clínica Antiaging Group Barcelona. "
+    "Conserva los datos útiles para continuarla: idioma del usuario, tratamientos o cirugías de interés, "
+    "precios ya dados, nombre y correo si los dio, si ya fue registrado y qué queda pendiente. "
+    "Si hay un resumen previo, intégralo. Responde solo con el resumen, en frases breves."
+)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt: int) -> float:
+    return 1.0 * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
+
 
 async def call_with_retry(func, *args, **kwargs):
     """
-    Wrapper con retry/backoff + jitter para manejar errores 429 o 503.
+    Wrapper con retry/backoff + jitter para errores transitorios de Azure OpenAI:
+    429 (se respeta `retry-after`), 5xx, timeouts y errores de conexión. Los demás
+    errores (400, 401, 404...) se propagan sin reintentar. Cada intento ya prueba
+    todos los deployments del pool (ver `send_chat_completion`).
     """
     for attempt in range(1, constants.OPENAI_MAX_RETRIES + 1):
         try:
             return await func(*args, **kwargs)
 
-        except HttpResponseError as e:
-            status = getattr(e.response, "status_code", None)
-            retry_after = None
+        except openai.APIStatusError as e:
+            if e.status_code not in RETRYABLE_STATUS or attempt == constants.OPENAI_MAX_RETRIES:
+                logger.error(f"❌ Error HTTP de Azure OpenAI ({e.status_code}): {e}")
+                raise
 
-            if hasattr(e, "response") and hasattr(e.response, "headers"):
-                retry_after = e.response.headers.get("retry-after")
+            retry_after = retry_after_seconds(e.response.headers)
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            logger.warning(f"⚠️ Azure OpenAI respondió {e.status_code}. Reintento {attempt}/{constants.OPENAI_MAX_RETRIES} en {delay:.2f}s...")
+            await asyncio.sleep(delay)
 
-            if status in [429, 503]:
-                delay = float(retry_after) if retry_after else (1.0 * (2 ** (attempt - 1)) + random.uniform(0, 0.5))
-                logger.warning(f"⚠️ Rate limit ({status}) detectado. Reintento {attempt}/{constants.OPENAI_MAX_RETRIES} en {delay:.2f}s...")
-                await asyncio.sleep(delay)
-            else:
-                logger.error(f"❌ Error HTTP inesperado ({status}): {e}")
-                raise e
+        except (openai.APIConnectionError, openai.APITimeoutError) as e:
+            if attempt == constants.OPENAI_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"⚠️ Azure OpenAI no respondió ({e}). Reintento {attempt}/{constants.OPENAI_MAX_RETRIES} en {delay:.2f}s...")
+            await asyncio.sleep(delay)
 
-        except Exception as e:
-            logger.exception(f"💥 Excepción inesperada en intento {attempt}: {e}")
-            await asyncio.sleep(1.0 * (2 ** (attempt - 1)))
 
-    raise Exception("🚫 Excedido el número máximo de reintentos con Azure OpenAI.")
+async def send_chat_completion(label: str = "chat", data_sources: bool = False, tried: list = None, **params):
+    """
+    `chat.completions.create` sobre el pool de deployments, con failover inmediato.
 
-async def run_conversation_with_rag(session_id: str, user_question: str):
+    - Elige deployment según `OPENAI_ROUTING` (ver `DeploymentPool`) y fija `model`
+      (y, con `data_sources=True`, el `extra_body` de Azure AI Search de ese recurso).
+    - Reserva cupo en el limitador compartido del deployment; si no hay, prueba el
+      siguiente, y en el último espera (como mucho `OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS`).
+    - Un 429, 5xx, timeout o error de conexión cuenta como fallo para el circuit breaker
+      y se prueba otro deployment sin esperar; si fallan todos se lanza el último error
+      (y `call_with_retry` aplica el backoff). Un 429 pausa el limitador de ese deployment.
+    - Ajusta el limitador con las cabeceras `x-ratelimit-*` y registra el uso.
+    - `tried` (opcional) recibe los deployments que se van probando, anotados antes de
+      enviar; el hedging comparte la lista entre las dos llamadas para que nunca coincidan.
     """
-    Ejecuta una conversación con Azure OpenAI usando RAG + llamadas a funciones paralelas.
-    Compatible con el patrón de function calling documentado por Azure.
+    pool = get_deployment_pool()
+    cost = (
+        count_messages_tokens(params["messages"])
+        + count_tools_tokens(params.get("tools"))
+        + (params.get("max_tokens") or 0)
+    )
+
+    tried = [] if tried is None else tried
+    last_error = None
+    while True:
+        deployment = pool.choose(exclude=tried)
+        if deployment is None:
+            if last_error is None:
+                # Solo con `tried` compartido: la otra llamada ocupó los que quedaban
+                raise RuntimeError("No queda ningún deployment libre en el pool de Azure OpenAI")
+            raise last_error
+        tried.append(deployment)
+        last_option = len(tried) == len(pool)
+
+        limiter = deployment.rate_limiter
+        if limiter is not None and not await limiter.acquire(cost, max_wait=None if last_option else 0):
+            if not last_option:
+                continue
+            logger.warning(f"⏳ Sin cupo en el deployment {deployment.name}; se envía la petición igualmente.")
+
+        request = dict(params, model=deployment.spec.deployment)
+        if data_sources:
+            request["extra_body"] = deployment.extra_body()
+
+        deployment.breaker.on_dispatch()
+        deployment.in_flight += 1
+        started = time.monotonic()
+        try:
+            raw = await deployment.client.chat.completions.with_raw_response.create(**request)
+        except openai.APIStatusError as e:
+            if e.status_code not in RETRYABLE_STATUS:
+                deployment.record(ok=True)  # error de la petición, no del deployment
+                raise
+            deployment.record(ok=False)
+            if isinstance(e, openai.RateLimitError) and limiter is not None:
+                # Todos los workers esperan lo que pide Azure, no solo el que recibió el 429
+                await limiter.pause(retry_after_seconds(e.response.headers) or backoff_delay(1))
+            last_error = e
+            logger.warning(f"🔀 Deployment {deployment.name} respondió {e.status_code}; se prueba otro.")
+            continue
+        except (openai.APIConnectionError, openai.APITimeoutError) as e:
+            deployment.record(ok=False)
+            last_error = e
+            logger.warning(f"🔀 Deployment {deployment.name} no respondió ({e}); se prueba otro.")
+            continue
+        except asyncio.CancelledError:
+            deployment.breaker.on_cancel()
+            raise
+        finally:
+            deployment.in_flight -= 1
+
+        latency = time.monotonic() - started
+        deployment.record(ok=True, latency=latency)
+        hedge_policy.observe(latency_kind(label, params.get("stream")), latency)
+        if limiter is not None:
+            await limiter.observe(raw.headers)
+
+        response = raw.parse()
+        if not params.get("stream"):
+            usage_stats.record(response.usage, f"{label}@{deployment.name}")
+        return response
+
+
+def latency_kind(label: str, stream: bool) -> str:
+    # En streaming la latencia medida es hasta las cabeceras, no hasta la respuesta completa
+    return f"{label}:stream" if stream else label
+
+
+async def hedged_chat_completion(label: str = "chat", data_sources: bool = False, **params):
+    """
+    `send_chat_completion` con hedging (`OPENAI_HEDGING_ENABLED`): si la llamada no ha
+    respondido cuando se cumple el percentil `OPENAI_HEDGE_PERCENTILE` de la latencia
+    reciente, se lanza un duplicado en otro deployment del pool; gana la primera respuesta
+    y la otra se cancela. Cada duplicado consume del presupuesto compartido
+    `OPENAI_HEDGE_BUDGET_PER_MINUTE`; sin presupuesto, sin otro deployment o sin muestras
+    suficientes se espera a la llamada original. En streaming solo se cubre la espera
+    hasta que el stream se abre.
     """
-    deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME_MAIN")
-    client = get_azure_openai_client()
+    pool = get_deployment_pool()
+    delay = hedge_policy.delay(latency_kind(label, params.get("stream"))) if settings.OPENAI_HEDGING_ENABLED else None
+    if delay is None or len(pool) < 2:
+        return await send_chat_completion(label, data_sources, **params)
 
-    # 🧠 Recuperar historial de conversación desde Redis
-    history = await session_memory.get_session(session_id)
-    # logger.info(f"📝 Historial recuperado desde Redis: {history}")
-    if not history:
-        history = []
-
-    # Construir el contexto inicial
-    messages = [{"role": "system", "content": constants.ASSISTANT_PROMPT}]
-    messages.extend(history)
-    messages.append({"role": "user", "content": user_question})
-
-    max_toks = constants.OPENAI_MAX_TOKENS if len(user_question) > 200 else int(constants.OPENAI_MAX_TOKENS / 3)
-
-    async def make_completion(messages, max_toks, force_text=False):
-        """
-        Realiza una llamada a Azure OpenAI ChatCompletion.
-        Si `force_text=True`, se fuerza tool_choice='none' para evitar más tool calls.
-        """
-        return await client.chat.completions.create(
-            model=deployment_name,
-            messages=messages,
-            tools=azure_tools.tools,
-            tool_choice="none" if force_text else "auto",
-            temperature=constants.OPENAI_TEMPERATURE,
-            max_tokens=max_toks,
-            extra_body={
-                "data_sources": [
-                    {
-                        "type": "azure_search",
-                        "parameters": {
-                            "endpoint": os.environ["AZURE_AI_SEARCH_ENDPOINT"],
-                            "index_name": os.environ["AZURE_AI_SEARCH_INDEX"],
-                            "query_type": "vector_semantic_hybrid",
-                            "semantic_configuration": "default",
-                            "fields_mapping": {
-                                "content_fields": ["content"],
-                                "title_field": "title",
-                            },
-                            "authentication": {
-                                "type": "api_key",
-                                "key": os.environ["AZURE_AI_SEARCH_API_KEY"],
-                            },
-                            "embedding_dependency": {
-                                "type": "deployment_name",
-                                "deployment_name": os.environ["AZURE_OPENAI_EMBEDDING_DEPLOYMENT"],
-                            },
-                        },
-                    },
-                ]
-            },
+    # Lista compartida: cada llamada anota su deployment antes de enviar y la otra lo excluye,
+    # también en los failovers posteriores
+    tried = []
+
+    async def should_hedge() -> bool:
+        if len(tried) >= len(pool):
+            return False
+        return await hedge_policy.take_budget()
+
+    response, hedged, hedge_won = await race(
+        lambda: send_chat_completion(label, data_sources, tried=tried, **params),
+        lambda: send_chat_completion(label, data_sources, tried=tried, **params),
+        delay,
+        should_hedge,
+    )
+    if hedged:
+        hedge_policy.launched += 1
+        hedge_policy.won += hedge_won
+        logger.info(
+            f"🏁 Hedge tras {delay:.2f}s: ganó la llamada {'duplicada' if hedge_won else 'original'} "
+            f"({hedge_policy.won}/{hedge_policy.launched} ganados por el duplicado)."
+        )
+    return response
+
+EMPTY_ANSWER_MESSAGE = "⚠️ No se pudo generar una respuesta válida en este momento. Intenta nuevamente."
+# En streaming, el texto de cada ronda se retiene hasta esta longitud: el preámbulo de una
+# ronda que termina pidiendo tools ("Voy a consultar los precios...") es corto y no se envía.
+STREAM_HOLDBACK_CHARS = 200
+
+
+async def create_chat_completion(messages, max_toks, force_text=False, stream=False):
+    """
+    Realiza una llamada a Azure OpenAI ChatCompletion a través del pool de deployments.
+    Si `force_text=True`, se fuerza tool_choice='none' para evitar más tool calls.
+    Con `stream=True` retorna el stream de chunks en lugar de la respuesta completa;
+    el último chunk trae el `usage` (sin choices).
+
+    El prompt empieza siempre por el mismo prefijo (tools + system prompt, idénticos byte
+    a byte entre llamadas) para que Azure lo sirva desde su caché de prompts; lo variable
+    (resumen, historial, pregunta) va detrás. `tool_choice` no cambia el prefijo.
+    """
+    return await hedged_chat_completion(
+        data_sources=True,
+        messages=messages,
+        tools=tool_registry.schemas,
+        tool_choice="none" if force_text else "auto",
+        temperature=constants.OPENAI_TEMPERATURE,
+        max_tokens=max_toks,
+        stream=stream,
+        **({"stream_options": {"include_usage": True}} if stream else {}),
+    )
+
+
+class StreamedMessage:
+    """Reconstruye el mensaje del asistente (texto + tool_calls) a partir de los deltas de un stream."""
+
+    def __init__(self):
+        self.parts = []
+        self._tool_calls = {}
+
+    def add(self, delta):
+        if delta.content:
+            self.parts.append(delta.content)
+        for tool_call in delta.tool_calls or []:
+            entry = self._tool_calls.setdefault(
+                tool_call.index,
+                {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+            )
+            if tool_call.id:
+                entry["id"] = tool_call.id
+            if tool_call.function:
+                entry["function"]["name"] += tool_call.function.name or ""
+                entry["function"]["arguments"] += tool_call.function.arguments or ""
+
+    @property
+    def content(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def has_tool_calls(self) -> bool:
+        return bool(self._tool_calls)
+
+    @property
+    def tool_calls(self) -> list:
+        return [
+            ChatCompletionMessageToolCall.model_validate(self._tool_calls[index])
+            for index in sorted(self._tool_calls)
+        ]
+
+
+async def load_conversation(session_id: str, user_question: str):
+    """
+    Recupera el historial desde Redis y construye el contexto inicial dentro de
+    `OPENAI_PROMPT_BUDGET_TOKENS`: system prompt (del idioma de la sesión si se conoce),
+    tools, resumen, los turnos más recientes que quepan y la pregunta (truncada a
+    `OPENAI_MAX_QUESTION_TOKENS`). Retorna (history, messages).
+    """
+    history, summary, cached_language = await session_memory.get_session_state(session_id)
+
+    # 🌐 Idioma de la sesión (cacheado en Redis): elige el system prompt reducido de ese idioma
+    language = None
+    if settings.LANGUAGE_PROMPTS_ENABLED:
+        language = resolve_language(user_question, cached_language, constants.LANGUAGE_NAMES)
+        if language is not None and language != cached_language:
+            await session_memory.save_language(session_id, language)
+
+    question_tokens = count_tokens(user_question)
+    if question_tokens > settings.OPENAI_MAX_QUESTION_TOKENS:
+        logger.warning(f"✂️ Pregunta de {question_tokens} tokens truncada a {settings.OPENAI_MAX_QUESTION_TOKENS}.")
+        user_question = truncate_tokens(user_question, settings.OPENAI_MAX_QUESTION_TOKENS)
+
+    # Orden fijo: prefijo estático (cacheable por Azure) y después lo propio de la sesión
+    question_message = {"role": "user", "content": user_question}
+    remaining = settings.OPENAI_PROMPT_BUDGET_TOKENS - prompt.prefix_tokens(language) - count_messages_tokens([question_message])
+
+    messages = [prompt.system_message(language)]
+    summary = truncate_tokens(summary or "", min(settings.HISTORY_SUMMARY_MAX_TOKENS, remaining))
+    if summary:
+        messages.append(chat_history.summary_message(summary))
+        remaining -= count_messages_tokens(messages[1:])
+
+    recent = chat_history.trim_to_budget(history, remaining)
+    if len(recent) < len(history):
+        logger.info(f"✂️ Historial recortado al presupuesto: {len(recent)}/{len(history)} mensajes.")
+    messages.extend(recent)
+    messages.append(question_message)
+    return history, messages
+
+
+async def save_conversation(session_id: str, history: list, user_question: str, answer: str, language: str = None):
+    """
+    Guarda el turno en Redis. Si el historial supera `HISTORY_MAX_TOKENS`, los turnos
+    antiguos se resumen en segundo plano (o se descartan si el resumen está desactivado).
+    `language` fija el idioma de la sesión si aún no tenía uno.
+    """
+    history.extend([
+        {"role": "user", "content": user_question},
+        {"role": "assistant", "content": answer}
+    ])
+
+    if len(history) > MAX_HISTORY_MESSAGES:
+        history = history[-MAX_HISTORY_MESSAGES:]
+
+    folded, kept = chat_history.split_for_summary(history, settings.HISTORY_MAX_TOKENS, settings.HISTORY_KEEP_MESSAGES)
+    if folded and not settings.HISTORY_SUMMARY_ENABLED:
+        history = chat_history.trim_to_budget(history, settings.HISTORY_MAX_TOKENS) or kept
+
+    await session_memory.connect()
+    await session_memory.save_session(session_id, history, language=language)
+
+    if folded and settings.HISTORY_SUMMARY_ENABLED and session_id not in _summaries_in_progress:
+        _summaries_in_progress.add(session_id)
+        task = asyncio.create_task(summarize_history(session_id, folded))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def summarize_history(session_id: str, folded: list):
+    """Resume `folded` junto con el resumen previo y lo sustituye en Redis (fuera del camino de la respuesta)."""
+    try:
+        _, previous, _ = await session_memory.get_session_state(session_id)
+        transcript = chat_history.render_transcript(folded)
+        content = f"Resumen previo:\n{previous}\n\nConversación:\n{transcript}" if previous else transcript
+        response = await call_with_retry(
+            send_chat_completion,
+            "summary",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": content},
+            ],
+            max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+            temperature=0,
         )
+        summary = response.choices[0].message.content
+        if not summary:
+            return
+        if await session_memory.fold_into_summary(session_id, folded, summary):
+            logger.info(f"🗜️ Sesión {session_id}: {len(folded)} mensajes resumidos en {count_tokens(summary)} tokens.")
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo resumir el historial de la sesión {session_id} ({e}).")
+    finally:
+        _summaries_in_progress.discard(session_id)
 
-    # 🌀 Primera llamada con retry
-    response = await call_with_retry(make_completion, messages, max_toks)
-    response_message = response.choices[0].message
-    logger.info(f"📌 RESPONSE RAW: {response_message}")
 
+async def append_tool_results(messages: list, content: str, tool_calls: list):
+    """Añade el turno del asistente con sus tool_calls y la respuesta de cada tool."""
+    # El mensaje del asistente debe incluir sus tool_calls para que la API acepte las respuestas "tool"
     messages.append({
-        "role": response_message.role,
-        "content": response_message.content or "",
+        "role": "assistant",
+        "content": content or "",
+        "tool_calls": [tool_call.model_dump() for tool_call in tool_calls],
     })
 
-    # logger.info("🧠 Respuesta inicial recibida.")
-
-    # 🚀 Manejo de llamadas paralelas (parallel tool calls)
-    if response_message.tool_calls:
-        # print("============= HAY LLAMADO DE FUNCIONES ============================")
-        for tool_call in response_message.tool_calls:
-            function_name = tool_call.function.name
-            try:
-                function_args = json.loads(tool_call.function.arguments)
-            except Exception:
-                logger.warning(f"⚠️ Argumentos inválidos para {function_name}: {tool_call.function.arguments}")
-                continue
+    # 🚀 Llamadas paralelas (parallel tool calls): se ejecutan concurrentemente
+    responses = await tool_registry.call_many(tool_calls)
+    for tool_call, response in zip(tool_calls, responses):
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": response,
+        })
+
+
+def match_local_intent(user_question: str):
+    """Saludo, agradecimiento o despedida que se responde con plantilla; None si hay que llamar al modelo."""
+    if not settings.LOCAL_INTENTS_ENABLED:
+        return None
+    return classify_intent(user_question)
+
+
+async def answer_local_intent(session_id: str, user_question: str, intent) -> str:
+    """
+    Turno de plantilla: solo lee el historial crudo y guarda el turno, sin resumen, idioma
+    ni presupuesto de tokens. El idioma del intent se guarda si la sesión aún no tenía uno.
+    """
+    logger.info(f"👋 Intent local '{intent.name}' [{intent.language}]: {user_question}")
+    history = await session_memory.get_session(session_id)
+    language = intent.language if settings.LANGUAGE_PROMPTS_ENABLED else None
+    await save_conversation(session_id, history, user_question, intent.reply, language=language)
+    return intent.reply
+
+
+def max_tokens_for(user_question: str) -> int:
+    long_question = count_tokens(user_question) > settings.OPENAI_LONG_QUESTION_TOKENS
+    return constants.OPENAI_MAX_TOKENS if long_question else int(constants.OPENAI_MAX_TOKENS / 3)
+
+
+def run_conversation_with_rag(session_id: str, user_question: str, stream: bool = False):
+    """
+    Ejecuta una conversación con Azure OpenAI usando RAG + llamadas a funciones paralelas.
+    Compatible con el patrón de function calling documentado por Azure.
+
+    - `stream=False`: retorna una corrutina; `await` da la respuesta completa.
+    - `stream=True`: retorna un generador asíncrono que produce el texto a medida que
+      llega (`async for delta in run_conversation_with_rag(..., stream=True)`).
+
+    Los saludos, agradecimientos y despedidas se detectan antes que nada y se responden
+    con plantilla, sin cargar la conversación completa.
+    """
+    intent = match_local_intent(user_question)
+    if stream:
+        return stream_conversation_with_rag(session_id, user_question, intent)
+    return complete_conversation_with_rag(session_id, user_question, intent)
+
 
-            logger.info(f"🧩 Tool Call: {function_name} | Args: {function_args}")
-
-            # Ejecutar función correspondiente
-            try:
-                if function_name == "is_customer_service_available":
-                    function_response = azure_tools.is_customer_service_available(
-                        input=function_args.get("input")
-                    )
-                elif function_name == "save_user":
-                    function_response = azure_tools.save_user(
-                        name=function_args.get("name"),
-                        email=function_args.get("email"),
-                    )
-                elif function_name == "procedures_and_treatments_price_list":
-                    function_response = azure_tools.procedures_and_treatments_price_list(
-                        name_surgery_or_treatment=function_args.get("name_surgery_or_treatment"),
-                    )
-                else:
-                    function_response = json.dumps({"error": f"Función desconocida: {function_name}"})
-
-            except Exception as e:
-                logger.exception(f"💥 Error ejecutando función {function_name}: {e}")
-                function_response = json.dumps({"error": str(e)})
-
-            # Registrar respuesta del tool
-            messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": function_response
-            })
-
-    else:
-        logger.info("ℹ️ No se detectaron tool calls en la respuesta inicial.")
-        pass
-
-    # 🚦 Evitar loops de tool calls: fuerza respuesta textual
-    final_response = await call_with_retry(make_completion, messages, max_toks, force_text=True)
-    final_message = final_response.choices[0].message
+async def complete_conversation_with_rag(session_id: str, user_question: str, intent=None) -> str:
+    # 👋 Saludos, agradecimientos y despedidas: plantilla en el idioma del usuario
+    if intent is not None:
+        return await answer_local_intent(session_id, user_question, intent)
+
+    # 🧠 Recuperar historial de conversación desde Redis
+    history, messages = await load_conversation(session_id, user_question)
+    max_toks = max_tokens_for(user_question)
+
+    # ⚡ Preguntas frecuentes de primer turno: respuesta cacheada sin llamar al modelo
+    cache_probe = await answer_cache.lookup(history, user_question)
+    if cache_probe is not None and cache_probe.answer is not None:
+        await save_conversation(session_id, history, user_question, cache_probe.answer)
+        return cache_probe.answer
+    cacheable = cache_probe is not None
+
+    # 🔁 Bucle de herramientas acotado: si el modelo no pide tools, su primera respuesta es la final
+    final_message = None
+    for round_number in range(1, settings.OPENAI_MAX_TOOL_ROUNDS + 1):
+        response = await call_with_retry(create_chat_completion, messages, max_toks)
+        response_message = response.choices[0].message
+        logger.info(f"📌 RESPONSE RAW (ronda {round_number}): {response_message}")
+
+        if not response_message.tool_calls:
+            final_message = response_message
+            break
+
+        cacheable = cacheable and tool_registry.is_cacheable(response_message.tool_calls)
+        await append_tool_results(messages, response_message.content, response_message.tool_calls)
+
+    if final_message is None:
+        # 🚦 Se agotaron las rondas: se fuerza una respuesta textual con los resultados obtenidos
+        logger.warning(f"⚠️ Se alcanzó el máximo de {settings.OPENAI_MAX_TOOL_ROUNDS} rondas de tools; se fuerza respuesta textual.")
+        final_response = await call_with_retry(create_chat_completion, messages, max_toks, force_text=True)
+        final_message = final_response.choices[0].message
 
     # ✅ Validar respuesta final
     if not final_message.content:
         logger.warning("⚠️ El modelo devolvió content=None. Detalles:")
         logger.warning(final_message)
-        return "⚠️ No se pudo generar una respuesta válida en este momento. Intenta nuevamente."
-    
-    # 💾 Guardar conversación en Redis (solo últimos N mensajes)
-    history.extend([
-        {"role": "user", "content": user_question},
-        {"role": "assistant", "content": final_message.content}
-    ])
+        return EMPTY_ANSWER_MESSAGE
 
-    # mantener sólo los últimos N mensajes
-    if len(history) > MAX_HISTORY:
-        history = history[-MAX_HISTORY:]
-
-    await session_memory.connect()
-    await session_memory.save_session(session_id, history)
+    # 💾 Guardar conversación en Redis
+    await save_conversation(session_id, history, user_question, final_message.content)
+    if cacheable:
+        await answer_cache.store(cache_probe, final_message.content)
 
     logger.info(f"💬 ================ Respuesta final: {final_message.content}")
     return final_message.content
+
+
+async def stream_conversation_with_rag(session_id: str, user_question: str, intent=None):
+    """
+    Versión en streaming: produce los deltas de texto de la respuesta a medida que llegan.
+    Las rondas de tools se resuelven igual que en modo normal; el reintento cubre la
+    apertura de cada stream, no los cortes a mitad de respuesta.
+
+    Solo se envía y se guarda el texto de la ronda final: el de cada ronda se retiene hasta
+    `STREAM_HOLDBACK_CHARS` (o hasta que acaba sin pedir tools) y se descarta si la ronda
+    pide tools.
+    """
+    # 👋 Saludos, agradecimientos y despedidas: plantilla en el idioma del usuario
+    if intent is not None:
+        yield await answer_local_intent(session_id, user_question, intent)
+        return
+
+    history, messages = await load_conversation(session_id, user_question)
+    max_toks = max_tokens_for(user_question)
+
+    # ⚡ Preguntas frecuentes de primer turno: respuesta cacheada sin llamar al modelo
+    cache_probe = await answer_cache.lookup(history, user_question)
+    if cache_probe is not None and cache_probe.answer is not None:
+        await save_conversation(session_id, history, user_question, cache_probe.answer)
+        yield cache_probe.answer
+        return
+    cacheable = cache_probe is not None
+
+    answer = ""
+    for round_number in range(1, settings.OPENAI_MAX_TOOL_ROUNDS + 2):
+        force_text = round_number > settings.OPENAI_MAX_TOOL_ROUNDS
+        if force_text:
+            logger.warning(f"⚠️ Se alcanzó el máximo de {settings.OPENAI_MAX_TOOL_ROUNDS} rondas de tools; se fuerza respuesta textual.")
+
+        streamed = StreamedMessage()
+        # Con tool_choice='none' la ronda es la final: no hace falta retener nada
+        released = force_text
+        stream = await call_with_retry(create_chat_completion, messages, max_toks, force_text=force_text, stream=True)
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage_stats.record(chunk.usage, "stream")
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            streamed.add(delta)
+            if not delta.content or streamed.has_tool_calls:
+                continue
+            if released:
+                yield delta.content
+            elif len(streamed.content) >= STREAM_HOLDBACK_CHARS:
+                released = True
+                yield streamed.content
+
+        tool_calls = streamed.tool_calls
+        if not tool_calls or force_text:
+            if not released and streamed.content:
+                yield streamed.content
+            answer = streamed.content
+            break
+
+        if released:
+            logger.warning(f"⚠️ Ronda {round_number}: el modelo pidió tools tras {len(streamed.content)} caracteres de texto ya enviados.")
+        logger.info(f"📌 STREAM (ronda {round_number}): {len(tool_calls)} tool calls")
+        cacheable = cacheable and tool_registry.is_cacheable(tool_calls)
+        await append_tool_results(messages, streamed.content, tool_calls)
+
+    if not answer:
+        logger.warning("⚠️ El modelo no devolvió texto en modo streaming.")
+        yield EMPTY_ANSWER_MESSAGE
+        return
+
+    # 💾 Guardar conversación en Redis
+    await save_conversation(session_id, history, user_question, answer)
+    if cacheable:
+        await answer_cache.store(cache_probe, answer)
+    logger.info(f"💬 ================ Respuesta final (stream): {answer}")
@@ -1,12 +1,16 @@
 import re
 import json
 import holidays
-import unicodedata
 from zoneinfo import ZoneInfo
 from datetime import datetime, time
-from app.services.db import connection
+from app.core import constants
+from app.core.config import settings
+from app.services.db.lead_repository import get_lead_repository, ALREADY_EXISTS
+from app.services.db.lead_spool import get_lead_spool
+from app.services.cache.registered_emails import get_registered_emails
 from app.core.logging_config import logger
-from app.services.cloud.azure.azure_blob import AzureBlobService
+from app.services.prices.text import normalize_text
+from app.services.prices.price_index import price_index
 
 
 # Obtener hora actual de España
@@ -52,36 +56,23 @@ def is_customer_service_available(input: str = ""):
 #         "message": "El servicio de atención al cliente no está disponible actualmente."
 #     })
 
-def ensure_users_table():
-    """
-    Ensures that the 'users' table exists in the database.
-    If it does not exist, it will be created.
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
-    Table schema:
-        id    INT PRIMARY KEY IDENTITY(1,1)
-        name  NVARCHAR(255) NOT NULL
-        email NVARCHAR(255) UNIQUE NOT NULL
-    """
-    create_table_query = """
-    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='users' AND xtype='U')
-    CREATE TABLE users (
-        id INT PRIMARY KEY IDENTITY(1,1),
-        name NVARCHAR(255) NOT NULL,
-        email NVARCHAR(255) UNIQUE NOT NULL
-    );
-    """
 
-    try:
-        with connection.get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(create_table_query)
-                conn.commit()
-    except Exception as error:
-        print(f"⚠️ Failed to ensure 'users' table exists: {error}")
+def already_exists_response(email: str) -> str:
+    return json.dumps({
+        "status": "already_exists",
+        "message": f"El correo '{email}' ya está registrado. Intente con otro o contacte soporte."
+    })
+
 
 def save_user(name: str, email: str):
     """
     Inserta un nuevo registro en la tabla 'users' si no existe previamente.
+    Es una única sentencia INSERT: si el email ya existe, la violación de la restricción
+    UNIQUE se traduce a `already_exists` (sin SELECT previo y sin carreras entre workers).
+    El almacenamiento lo decide `LEADS_BACKEND` (Azure SQL o SQLite, ver `lead_repository`).
+    Es bloqueante, así que desde código async debe ejecutarse con `database.run(save_user, ...)`.
     Retorna un string JSON con:
       - message: texto explicativo que el modelo o el frontend pueden usar.
     """
@@ -90,28 +81,24 @@ def save_user(name: str, email: str):
     name = name.strip().title() if name else ""
     email = email.strip().lower() if email else ""
 
-    check_query = "SELECT COUNT(*) FROM users WHERE email = ?;"
-    insert_query = "INSERT INTO users (name, email) VALUES (?, ?);"
-
-    try:
-        ensure_users_table()  # Asegura que la tabla exista
+    # 🔎 Duplicados conocidos (Bloom + Redis): se responden sin tocar la base de datos
+    registered_emails = get_registered_emails() if settings.LEADS_EMAIL_FILTER_ENABLED else None
+    if registered_emails and registered_emails.is_registered(email):
+        logger.info(f"⚠️ Usuario existente (caché): {email}")
+        return already_exists_response(email)
 
-        with connection.get_connection() as conn:
-            with conn.cursor() as cursor:
-                # 🔍 Validar si el usuario ya existe
-                cursor.execute(check_query, (email,))
-                exists = cursor.fetchone()[0] > 0
+    if settings.LEADS_WRITE_MODE == "write_behind":
+        return queue_user(name, email)
 
-                if exists:
-                    logger.info(f"⚠️ Usuario existente: {email}")
-                    return json.dumps({
-                        "status": "already_exists",
-                        "message": f"El correo '{email}' ya está registrado. Intente con otro o contacte soporte."
-                    })
+    try:
+        # El esquema lo crea `ensure_schema` (migraciones en Azure SQL) al arrancar
+        status = get_lead_repository().insert(name, email)
+        if registered_emails:
+            registered_emails.add(email)
 
-                # 🆕 Insertar nuevo usuario
-                cursor.execute(insert_query, (name, email))
-                conn.commit()
+        if status == ALREADY_EXISTS:
+            logger.info(f"⚠️ Usuario existente: {email}")
+            return already_exists_response(email)
 
         logger.info(f"✅ Usuario registrado correctamente: {name} <{email}>")
 
@@ -127,34 +114,50 @@ def save_user(name: str, email: str):
             "message": f"No se pudo registrar al usuario '{name}' con correo '{email}'. Error: {error}"
         })
 
-def normalize_text(text: str) -> str:
+def queue_user(name: str, email: str) -> str:
     """
-    Normaliza un texto para búsquedas:
-    - Convierte a minúsculas
-    - Quita acentos y diacríticos
-    - Elimina caracteres no alfanuméricos (excepto espacios)
+    Modo write-behind: valida el lead, lo guarda en el spool local (SQLite) y responde
+    sin esperar a Azure SQL. `LeadFlusher` lo inserta después en lote.
     """
-    if not text:
-        return ""
-    
-    text = text.lower()
-    text = unicodedata.normalize('NFKD', text)
-    text = "".join([c for c in text if not unicodedata.combining(c)])
-    text = re.sub(r'[^a-z0-9\s]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
+    if not name or not EMAIL_PATTERN.match(email):
+        return json.dumps({
+            "status": "invalid",
+            "message": f"Los datos no son válidos: se necesita un nombre y un correo correcto (recibido '{email}')."
+        })
+
+    try:
+        status = get_lead_spool().enqueue(name, email)
+    except Exception as error:
+        logger.error(f"❌ Error al encolar usuario [{email}]: {error}")
+        return json.dumps({
+            "status": "error",
+            "message": f"No se pudo registrar al usuario '{name}' con correo '{email}'. Error: {error}"
+        })
+
+    if status == ALREADY_EXISTS:
+        logger.info(f"⚠️ Usuario existente (spool): {email}")
+        return already_exists_response(email)
+
+    logger.info(f"✅ Usuario encolado para registro: {name} <{email}>")
+    return json.dumps({
+        "status": "created",
+        "message": f"Usuario '{name}' con correo '{email}' registrado correctamente."
+    })
 
 def procedures_and_treatments_price_list(name_surgery_or_treatment: str) -> str:
     """
     Busca coincidencias de procedimientos, tratamientos y cirugías en el archivo de precios almacenado en Azure Blob Storage.
+    La lista se sirve desde el índice en memoria (`price_index`), que se refresca en segundo plano.
     La búsqueda es insensible a mayúsculas, acentos, caracteres especiales y soporta:
-      - Coincidencias parciales
+      - Coincidencias parciales (por prefijo)
       - Búsqueda por múltiples palabras sin importar el orden.
+      - Errores ortográficos (similitud de trigramas como fallback del match exacto).
+    Los resultados se ordenan por relevancia (BM25) y se recortan al presupuesto
+    `PRICE_RESULTS_MAX_ROWS` / `PRICE_RESULTS_MAX_CHARS`, con solo los campos útiles para el modelo
+    (nombre, precio, moneda, doctor, descripción corta y rango numérico price_min/price_max).
     Retorna un string JSON con los resultados y una nota aclaratoria indicando que los precios son referenciales.
     """
 
-    resultados = []
     query_words = normalize_text(name_surgery_or_treatment).split()
 
     if not query_words:
@@ -164,20 +167,18 @@ def procedures_and_treatments_price_list(name_surgery_or_treatment: str) -> str:
         })
 
     try:
-        # Inicializamos el servicio de Blob
-        blob_service = AzureBlobService()
-
-        # Leemos el CSV remoto
-        df = blob_service.read_csv_from_blob()
-
-        # Concatenamos y normalizamos los campos de búsqueda
-        df['search_text'] = df[['procedure_name', 'synonyms', 'raw_text']].fillna('').agg(' '.join, axis=1)
-        df['search_text'] = df['search_text'].apply(normalize_text)
-
-        # Buscamos coincidencias que contengan todas las palabras de la query
-        for _, fila in df.iterrows():
-            if all(word in fila['search_text'] for word in query_words):
-                resultados.append(fila.to_dict())
+        # Buscamos en el índice invertido las coincidencias más relevantes
+        # (una fila extra para saber si quedaron coincidencias fuera del presupuesto)
+        max_rows = constants.PRICE_RESULTS_MAX_ROWS
+        candidatos = price_index.search(name_surgery_or_treatment, top_k=max_rows + 1)
+
+        resultados = []
+        total_chars = 0
+        for candidato in candidatos[:max_rows]:
+            total_chars += len(json.dumps(candidato, ensure_ascii=False))
+            if resultados and total_chars > constants.PRICE_RESULTS_MAX_CHARS:
+                break
+            resultados.append(candidato)
 
         if not resultados:
             return json.dumps({
@@ -185,10 +186,14 @@ def procedures_and_treatments_price_list(name_surgery_or_treatment: str) -> str:
                 "nota": "💡 Los precios mostrados son aproximados y pueden variar según el procedimiento y la valoración médica."
             })
 
-        return json.dumps({
+        respuesta = {
             "resultados": resultados,
             "nota": "💡 Los precios listados son valores aproximados del dataset médico y pueden variar según el paciente, la clínica y el contexto del tratamiento."
-        })
+        }
+        if len(resultados) < len(candidatos):
+            respuesta["mas_resultados"] = "Hay más coincidencias; pide al usuario que concrete el tratamiento si no está en la lista."
+
+        return json.dumps(respuesta, ensure_ascii=False)
 
     except Exception as e:
         logger.error(f"❌ Error en procedures_and_treatments_price_list: {e}")
@@ -196,82 +201,3 @@ def procedures_and_treatments_price_list(name_surgery_or_treatment: str) -> str:
             "error": f"Ocurrió un error leyendo el CSV desde Azure Blob: {str(e)}",
             "nota": "💡 Los precios del dataset son referenciales y pueden variar."
         })
-
-tools = [
-    {
-        "type": "function",
-        "function": {
-            "name": "is_customer_service_available",
-            "description": "Comprueba si el servicio de atención al cliente está disponible actualmente en España. "
-                            "Utilízala cuando el usuario pregunte si puede ser atendido por un asesor, "
-                            "si hay soporte disponible, o si el horario de atención está activo. "
-                            "Devuelve True si el servicio está disponible en este momento, de lo contrario False.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "input": {
-                        "type": "string",
-                        "description": (
-                            "Texto opcional proporcionado por el usuario. "
-                            "Puede incluir su consulta o contexto, aunque no es necesario "
-                            "para determinar la disponibilidad del servicio."
-                        ),
-                    },
-                },
-                "required": ["input"],
-            },
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "save_user",
-            "description": "Guarda la información de un usuario en la base de datos. "
-                            "Utilízala cuando el usuario proporcione su nombre y correo electrónico "
-                            "para registrarse, dejar sus datos de contacto o continuar una solicitud con un asesor. "
-                            "La función crea la tabla 'users' si no existe y almacena el registro. "
-                            "Devuelve un objeto JSON con el estado de la operación ('status') y un mensaje descriptivo ('message').",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": (
-                            "Nombre del usuario. "
-                        ),
-                    },
-                    "email": {
-                        "type": "string",
-                        "description": (
-                            "Correo electronico del usuario, se usa para que un asesor de atencion al clinete contacte al usuario en horario disponible. "
-                        ),
-                    },
-                },
-                "required": ["name", "email"],
-            },
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "procedures_and_treatments_price_list",
-            "description":  "Busca coincidencias de procedimientos, tratamientos y cirugías en el archivo de precios "
-                            "almacenado en Azure Blob Storage. La búsqueda es insensible a mayúsculas, acentos y caracteres especiales, "
-                            "y soporta coincidencias parciales y búsqueda por múltiples palabras sin importar el orden. "
-                            "Devuelve un string JSON con los resultados encontrados o un mensaje explicativo si no hay coincidencias.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name_surgery_or_treatment": {
-                        "type": "string",
-                        "description": (
-                            "Nombre de la cirugía o tratamiento que se desea buscar en la lista de precios. "
-                            "Puede ser parcial o contener varias palabras."
-                        ),
-                    },
-                },
-                "required": ["name_surgery_or_treatment"],
-            },
-        }
-    }
-]
@@ -0,0 +1,214 @@
+import os
+import json
+import asyncio
+import hashlib
+import tempfile
+from dataclasses import dataclass, asdict
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from app.core.config import settings
+from app.core.logging_config import logger
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    digest: str
+    etag: str
+    last_modified: str
+    size: int
+
+
+class BlobDiskCache:
+    """
+    Caché local en disco, direccionada por contenido, para blobs de referencia.
+
+    - `objects/<sha256>`: contenido del blob (blobs idénticos comparten archivo).
+    - `meta/<sha1(key)>.json`: ETag, Last-Modified y digest de cada `contenedor/blob`.
+      El mtime del archivo de metadatos es el último acceso y ordena la expulsión LRU.
+    - Todas las escrituras son atómicas (temporal + `os.replace`), así que varios workers
+      pueden compartir el mismo directorio.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or settings.BLOB_CACHE_DIR
+        self.max_bytes = max_bytes or settings.BLOB_CACHE_MAX_BYTES
+        self.objects_dir = os.path.join(self.directory, "objects")
+        self.meta_dir = os.path.join(self.directory, "meta")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.meta_dir, exist_ok=True)
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.meta_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest)
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, key: str):
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                entry = CacheEntry(**json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        if not os.path.exists(self._object_path(entry.digest)):
+            return None
+        return entry
+
+    def read(self, entry: CacheEntry) -> bytes:
+        with open(self._object_path(entry.digest), "rb") as f:
+            return f.read()
+
+    def touch(self, entry: CacheEntry):
+        try:
+            os.utime(self._meta_path(entry.key))
+        except FileNotFoundError:
+            pass
+
+    def put(self, key: str, content: bytes, etag: str, last_modified) -> CacheEntry:
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            self._write_atomic(object_path, content)
+
+        entry = CacheEntry(
+            key=key,
+            digest=digest,
+            etag=etag,
+            last_modified=str(last_modified) if last_modified else None,
+            size=len(content),
+        )
+        self._write_atomic(self._meta_path(key), json.dumps(asdict(entry)).encode("utf-8"))
+        self.evict(keep=key)
+        return entry
+
+    def evict(self, keep: str = None):
+        """
+        Expulsa las entradas menos usadas hasta quedar por debajo de `max_bytes`.
+        La entrada `keep` (la recién escrita) nunca se expulsa.
+        """
+        keep_path = self._meta_path(keep) if keep else None
+        entries = []
+        for name in os.listdir(self.meta_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.meta_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries.append((os.path.getmtime(path), path, json.load(f)))
+            except (OSError, ValueError):
+                continue
+
+        def total_size(items):
+            # Contenido deduplicado: cada digest cuenta una sola vez
+            return sum({meta["digest"]: meta["size"] for _, _, meta in items}.values())
+
+        live = sorted(entries, key=lambda item: item[0])
+        candidates = [item for item in live if item[1] != keep_path]
+        while candidates and total_size(live) > self.max_bytes:
+            victim = candidates.pop(0)
+            live.remove(victim)
+            try:
+                os.unlink(victim[1])
+            except OSError:
+                pass
+
+        referenced = {meta["digest"] for _, _, meta in live}
+        for name in os.listdir(self.objects_dir):
+            if name not in referenced and not name.endswith(".tmp"):
+                try:
+                    os.unlink(self._object_path(name))
+                except OSError:
+                    pass
+
+
+def _read_entry(cache: BlobDiskCache, entry: CacheEntry):
+    """
+    Retorna (contenido, entry), o None si el archivo ya no existe: el directorio es
+    compartido y el `evict()` de otro worker puede borrarlo entre `get()` y la lectura.
+    """
+    cache.touch(entry)
+    try:
+        return cache.read(entry), entry
+    except FileNotFoundError:
+        return None
+
+
+def _serve_stale(cache: BlobDiskCache, key: str, entry: CacheEntry, error: Exception):
+    if entry is None or isinstance(error, ResourceNotFoundError):
+        raise error
+    cached = _read_entry(cache, entry)
+    if cached is None:
+        raise error
+    logger.warning(f"⚠️ Azure Blob no respondió para '{key}' ({error}); se sirve la copia en caché (etag={entry.etag}).")
+    return cached
+
+
+def read_through(cache: BlobDiskCache, key: str, fetch):
+    """
+    Lectura con caché: `fetch(etag)` revalida contra Azure (If-None-Match) y retorna
+    (contenido, properties) o None si no cambió. Si Azure falla, se sirve la copia local.
+    Retorna (contenido, entry).
+    """
+    entry = cache.get(key)
+    try:
+        result = fetch(entry.etag if entry else None)
+    except Exception as e:
+        return _serve_stale(cache, key, entry, e)
+
+    if result is None:
+        cached = _read_entry(cache, entry)
+        if cached is not None:
+            return cached
+        # La copia se expulsó mientras se revalidaba: descarga completa, sin ETag
+        logger.info(f"ℹ️ La copia en caché de '{key}' se expulsó durante la revalidación; se descarga de nuevo.")
+        result = fetch(None)
+
+    content, properties = result
+    return content, cache.put(key, content, properties.etag, properties.last_modified)
+
+
+async def read_through_async(cache: BlobDiskCache, key: str, fetch, timeout: float = None):
+    """
+    Versión asíncrona de `read_through`; si Azure tarda más de `timeout` se sirve la copia local.
+    El acceso a disco (lectura, escritura y expulsión) va a un hilo para no bloquear el event loop.
+    """
+    entry = await asyncio.to_thread(cache.get, key)
+    timeout = timeout or settings.BLOB_CACHE_TIMEOUT_SECONDS
+    try:
+        result = await asyncio.wait_for(fetch(entry.etag if entry else None), timeout=timeout if entry else None)
+    except Exception as e:
+        return await asyncio.to_thread(_serve_stale, cache, key, entry, e)
+
+    if result is None:
+        cached = await asyncio.to_thread(_read_entry, cache, entry)
+        if cached is not None:
+            return cached
+        # La copia se expulsó mientras se revalidaba: descarga completa, sin ETag
+        logger.info(f"ℹ️ La copia en caché de '{key}' se expulsó durante la revalidación; se descarga de nuevo.")
+        result = await fetch(None)
+
+    content, properties = result
+    entry = await asyncio.to_thread(cache.put, key, content, properties.etag, properties.last_modified)
+    return content, entry
+
+
+_blob_cache = None
+
+
+def get_blob_cache() -> BlobDiskCache:
+    """Caché compartida por el proceso (el directorio se comparte también entre workers)."""
+    global _blob_cache
+    if _blob_cache is None:
+        _blob_cache = BlobDiskCache()
+    return _blob_cache
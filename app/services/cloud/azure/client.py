@@ -1,12 +1,69 @@
 import os
+import httpx
+from dataclasses import dataclass
 from app.core import constants
+from app.core.config import settings
 from openai import AsyncAzureOpenAI
 
 
-def get_azure_openai_client() -> AsyncAzureOpenAI:
+@dataclass(frozen=True)
+class ChatConfig:
+    """
+    Parámetros fijos de las llamadas de chat, leídos del entorno una sola vez.
+
+    - deployment_name: AZURE_OPENAI_DEPLOYMENT_NAME_MAIN.
+    - extra_body: plantilla `data_sources` de Azure AI Search (RAG "On Your Data").
+    - embedding_deployment: AZURE_OPENAI_EMBEDDING_DEPLOYMENT.
     """
-    Crea y devuelve un cliente de Azure OpenAI configurado con las credenciales
-    y el endpoint especificados en las variables de entorno.
+    deployment_name: str
+    extra_body: dict
+    embedding_deployment: str
+
+
+def build_chat_config() -> ChatConfig:
+    """
+    Construye la configuración de chat a partir de las variables de entorno.
+    Lanza KeyError si falta alguna variable de Azure AI Search.
+    """
+    return ChatConfig(
+        deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME_MAIN"),
+        embedding_deployment=os.environ["AZURE_OPENAI_EMBEDDING_DEPLOYMENT"],
+        extra_body={
+            "data_sources": [
+                {
+                    "type": "azure_search",
+                    "parameters": {
+                        "endpoint": os.environ["AZURE_AI_SEARCH_ENDPOINT"],
+                        "index_name": os.environ["AZURE_AI_SEARCH_INDEX"],
+                        "query_type": "vector_semantic_hybrid",
+                        "semantic_configuration": "default",
+                        "fields_mapping": {
+                            "content_fields": ["content"],
+                            "title_field": "title",
+                        },
+                        "authentication": {
+                            "type": "api_key",
+                            "key": os.environ["AZURE_AI_SEARCH_API_KEY"],
+                        },
+                        "embedding_dependency": {
+                            "type": "deployment_name",
+                            "deployment_name": os.environ["AZURE_OPENAI_EMBEDDING_DEPLOYMENT"],
+                        },
+                    },
+                },
+            ]
+        },
+    )
+
+
+def create_azure_openai_client(endpoint: str = None, api_key: str = None) -> AsyncAzureOpenAI:
+    """
+    Crea un cliente de Azure OpenAI configurado con las credenciales
+    y el endpoint especificados en las variables de entorno (o los indicados,
+    para los demás recursos del pool de deployments).
+
+    El cliente usa un pool HTTP propio con límites explícitos y keep-alive
+    (`OPENAI_POOL_*`), para reutilizar las conexiones TLS entre peticiones.
 
     Variables de entorno necesarias:
         - AZURE_OPENAI_ENDPOINT_MAIN: URL del recurso Azure OpenAI.
@@ -16,16 +73,61 @@ def get_azure_openai_client() -> AsyncAzureOpenAI:
         AsyncAzureOpenAI: Instancia del cliente listo para realizar llamadas a la API.
     """
     # Obtenemos la URL del endpoint de Azure OpenAI desde las variables de entorno
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT_MAIN")
-    
+    endpoint = endpoint or os.getenv("AZURE_OPENAI_ENDPOINT_MAIN")
+
     # Obtenemos la clave de API desde las variables de entorno
-    api_key = os.getenv("AZURE_OPENAI_API_KEY_MAIN")
+    api_key = api_key or os.getenv("AZURE_OPENAI_API_KEY_MAIN")
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.OPENAI_READ_TIMEOUT_SECONDS,
+            connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS,
+        ),
+    )
 
     # Creamos la instancia del cliente Azure OpenAI con la versión de API deseada
     client = AsyncAzureOpenAI(
         azure_endpoint=endpoint,
         api_key=api_key,
-        api_version=constants.AZURE_OPENAI_API_VERSION
+        api_version=constants.AZURE_OPENAI_API_VERSION,
+        http_client=http_client,
+        # Los reintentos los hace `call_with_retry` (con el limitador compartido); sin esto
+        # el SDK reintentaría por su cuenta cada intento
+        max_retries=0,
     )
 
     return client
+
+
+_client = None
+_chat_config = None
+
+
+def get_azure_openai_client() -> AsyncAzureOpenAI:
+    """
+    Devuelve el cliente compartido del worker (se crea en el lifespan de la app;
+    si se usa fuera de ella, se crea en el primer uso).
+    """
+    global _client
+    if _client is None:
+        _client = create_azure_openai_client()
+    return _client
+
+
+def get_chat_config() -> ChatConfig:
+    global _chat_config
+    if _chat_config is None:
+        _chat_config = build_chat_config()
+    return _chat_config
+
+
+async def close_azure_openai_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import copy
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.cloud.azure.client import create_azure_openai_client, get_azure_openai_client, get_chat_config
+from app.services.cloud.azure.rate_limiter import get_rate_limiter
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class DeploymentSpec:
+    """
+    Un deployment de chat del pool (`AZURE_OPENAI_DEPLOYMENTS`).
+
+    - name: identificador único (logs, breaker y clave del limitador en Redis).
+    - endpoint / api_key: recurso de Azure OpenAI (región).
+    - deployment: nombre del deployment de chat en ese recurso.
+    - weight: peso en el reparto `weighted`.
+    - embedding_deployment: deployment de embeddings para Azure AI Search en ese recurso
+      (por defecto AZURE_OPENAI_EMBEDDING_DEPLOYMENT).
+    - rpm / tpm: cuota del deployment (por defecto OPENAI_RATE_LIMIT_RPM / _TPM).
+    """
+    name: str
+    endpoint: str
+    api_key: str
+    deployment: str
+    weight: float = 1.0
+    embedding_deployment: Optional[str] = None
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+
+
+def load_deployment_specs() -> list:
+    """
+    Lee `AZURE_OPENAI_DEPLOYMENTS`: lista JSON de deployments, p. ej.
+        [{"name": "weu", "endpoint": "https://...", "api_key_env": "AZURE_OPENAI_API_KEY_WEU",
+          "deployment": "gpt-4o", "weight": 2}, ...]
+    La clave se lee de la variable indicada en `api_key_env` (o de `api_key`).
+    Sin la variable, el pool es solo el deployment MAIN de siempre.
+    """
+    raw = os.getenv("AZURE_OPENAI_DEPLOYMENTS")
+    if not raw:
+        return [DeploymentSpec(
+            name="main",
+            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT_MAIN"),
+            api_key=os.getenv("AZURE_OPENAI_API_KEY_MAIN"),
+            deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME_MAIN"),
+        )]
+
+    specs = []
+    for entry in json.loads(raw):
+        entry = dict(entry)
+        api_key_env = entry.pop("api_key_env", None)
+        if api_key_env:
+            entry["api_key"] = os.environ[api_key_env]
+        specs.append(DeploymentSpec(**entry))
+    if len({spec.name for spec in specs}) != len(specs):
+        raise ValueError("AZURE_OPENAI_DEPLOYMENTS: los nombres de deployment deben ser únicos")
+    return specs
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por tasa de errores en una ventana deslizante.
+
+    - closed: pasa todo; se abre si en `window` segundos hay al menos `min_requests`
+      llamadas y la fracción de fallos alcanza `failure_rate`.
+    - open: no recibe tráfico durante `cooldown` segundos.
+    - half_open: deja pasar una sola llamada de prueba; si va bien se cierra, si falla se reabre.
+    """
+
+    def __init__(self, failure_rate: float, min_requests: int, window: float, cooldown: float):
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._outcomes = deque()
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return not self._probe_in_flight
+
+    def on_dispatch(self):
+        """Marca el envío de una llamada; pasado el cooldown, la primera es la de prueba."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = True
+
+    def on_cancel(self):
+        """Una llamada se canceló sin resultado: si era la de prueba, otra puede ocupar su lugar."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record(self, ok: bool) -> Optional[str]:
+        """Registra el resultado de una llamada. Retorna el nuevo estado si cambió."""
+        now = time.monotonic()
+        with self._lock:
+            previous = self.state
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self.state = OPEN
+                    self.opened_at = now
+            elif self.state == CLOSED:
+                self._outcomes.append((now, ok))
+                while self._outcomes and now - self._outcomes[0][0] > self.window:
+                    self._outcomes.popleft()
+                failures = sum(1 for _, success in self._outcomes if not success)
+                total = len(self._outcomes)
+                if total >= self.min_requests and failures / total >= self.failure_rate:
+                    self.state = OPEN
+                    self.opened_at = now
+            return self.state if self.state != previous else None
+
+
+class Deployment:
+    """Estado en tiempo de ejecución de un deployment: cliente, breaker, latencia y limitador."""
+
+    def __init__(self, spec: DeploymentSpec, client, owns_client: bool):
+        self.spec = spec
+        self.name = spec.name
+        self.client = client
+        self.owns_client = owns_client
+        self.breaker = CircuitBreaker(
+            failure_rate=settings.OPENAI_BREAKER_FAILURE_RATE,
+            min_requests=settings.OPENAI_BREAKER_MIN_REQUESTS,
+            window=settings.OPENAI_BREAKER_WINDOW_SECONDS,
+            cooldown=settings.OPENAI_BREAKER_COOLDOWN_SECONDS,
+        )
+        self.latency = None  # media móvil exponencial (segundos)
+        self.in_flight = 0
+
+    @property
+    def rate_limiter(self):
+        return get_rate_limiter(self.name, rpm=self.spec.rpm, tpm=self.spec.tpm)
+
+    def extra_body(self) -> dict:
+        """`data_sources` de Azure AI Search con el deployment de embeddings de este recurso."""
+        extra_body = get_chat_config().extra_body
+        if not self.spec.embedding_deployment:
+            return extra_body
+        extra_body = copy.deepcopy(extra_body)
+        for source in extra_body.get("data_sources", []):
+            source["parameters"]["embedding_dependency"]["deployment_name"] = self.spec.embedding_deployment
+        return extra_body
+
+    def record(self, ok: bool, latency: float = None):
+        if ok and latency is not None:
+            alpha = settings.OPENAI_LATENCY_EWMA_ALPHA
+            self.latency = latency if self.latency is None else alpha * latency + (1 - alpha) * self.latency
+        new_state = self.breaker.record(ok)
+        if new_state == OPEN:
+            logger.warning(f"🔌 Circuit breaker abierto para el deployment {self.name}; se deriva el tráfico.")
+        elif new_state == CLOSED:
+            logger.info(f"🔌 Circuit breaker cerrado: el deployment {self.name} vuelve a recibir tráfico.")
+
+
+class DeploymentPool:
+    """
+    Pool de deployments de chat con reparto y failover.
+
+    - `OPENAI_ROUTING=weighted`: aleatorio según `weight`.
+    - `OPENAI_ROUTING=least_latency`: el de menor latencia media (ponderada por las llamadas
+      en curso); una fracción `OPENAI_ROUTING_EXPLORE` va a otro al azar para refrescar medidas.
+    Solo se eligen deployments con el breaker cerrado (o en prueba). Si todos están abiertos,
+    se usa el que abrió hace más tiempo: mejor intentarlo que fallar sin llamar.
+    Los breakers y latencias son por worker.
+    """
+
+    def __init__(self, deployments: list):
+        if not deployments:
+            raise ValueError("El pool de deployments está vacío")
+        self.deployments = deployments
+
+    def __len__(self):
+        return len(self.deployments)
+
+    def choose(self, exclude=()) -> Optional[Deployment]:
+        """
+        Elige un deployment que no esté en `exclude`; None si no queda ninguno.
+        Quien envíe la petición debe llamar a `breaker.on_dispatch()`.
+        """
+        candidates = [d for d in self.deployments if d not in exclude]
+        if not candidates:
+            return None
+
+        available = [d for d in candidates if d.breaker.is_available()]
+        if not available:
+            chosen = min(candidates, key=lambda d: d.breaker.opened_at)
+        elif settings.OPENAI_ROUTING == "least_latency":
+            if len(available) > 1 and random.random() < settings.OPENAI_ROUTING_EXPLORE:
+                chosen = random.choice(available)
+            else:
+                chosen = min(available, key=lambda d: (d.latency or 0.0) * (1 + d.in_flight))
+        else:
+            chosen = random.choices(available, weights=[d.spec.weight for d in available])[0]
+        return chosen
+
+    async def close(self):
+        for deployment in self.deployments:
+            if deployment.owns_client:
+                await deployment.client.close()
+
+
+def create_deployment_pool(specs: list = None) -> DeploymentPool:
+    deployments = []
+    main_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT_MAIN")
+    for spec in specs or load_deployment_specs():
+        # El recurso MAIN reutiliza el cliente compartido del worker (mismo pool HTTP)
+        if spec.endpoint == main_endpoint and spec.api_key == os.getenv("AZURE_OPENAI_API_KEY_MAIN"):
+            deployments.append(Deployment(spec, get_azure_openai_client(), owns_client=False))
+        else:
+            deployments.append(Deployment(spec, create_azure_openai_client(spec.endpoint, spec.api_key), owns_client=True))
+    logger.info(f"✅ Pool de Azure OpenAI: {', '.join(d.name for d in deployments)} (routing {settings.OPENAI_ROUTING}).")
+    return DeploymentPool(deployments)
+
+
+_deployment_pool = None
+
+
+def get_deployment_pool() -> DeploymentPool:
+    global _deployment_pool
+    if _deployment_pool is None:
+        _deployment_pool = create_deployment_pool()
+    return _deployment_pool
+
+
+async def close_deployment_pool():
+    global _deployment_pool
+    if _deployment_pool is not None:
+        await _deployment_pool.close()
+        _deployment_pool = None
@@ -0,0 +1,142 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.cache.redis_config import get_redis_url
+
+
+class LatencyTracker:
+    """Últimas `window` latencias (segundos) de un tipo de llamada, para calcular percentiles."""
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float):
+        with self._lock:
+            self.samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class HedgePolicy:
+    """
+    Cuándo y cuánto duplicar (hedging) las llamadas de chat.
+
+    - El retardo del hedge es el percentil `OPENAI_HEDGE_PERCENTILE` de las latencias recientes
+      del worker para ese tipo de llamada ("chat" completa, "stream" hasta las cabeceras),
+      nunca menor que `OPENAI_HEDGE_MIN_DELAY_SECONDS`. Sin `OPENAI_HEDGE_MIN_SAMPLES`
+      muestras no se duplica.
+    - Presupuesto: como mucho `OPENAI_HEDGE_BUDGET_PER_MINUTE` duplicados por minuto entre
+      todos los workers (contador en Redis). Si Redis falla no se duplica.
+    """
+
+    def __init__(self, redis_client=None, prefix: str = "hedge:budget"):
+        self.prefix = prefix
+        self._redis = redis_client
+        self._trackers = {}
+        self.launched = 0
+        self.won = 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                get_redis_url(),
+                decode_responses=True,
+                socket_timeout=settings.OPENAI_RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.OPENAI_RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+            )
+        return self._redis
+
+    def tracker(self, kind: str) -> LatencyTracker:
+        if kind not in self._trackers:
+            self._trackers[kind] = LatencyTracker(settings.OPENAI_HEDGE_WINDOW)
+        return self._trackers[kind]
+
+    def observe(self, kind: str, latency: float):
+        self.tracker(kind).add(latency)
+
+    def delay(self, kind: str) -> Optional[float]:
+        tracker = self.tracker(kind)
+        if len(tracker) < settings.OPENAI_HEDGE_MIN_SAMPLES:
+            return None
+        return max(settings.OPENAI_HEDGE_MIN_DELAY_SECONDS, tracker.percentile(settings.OPENAI_HEDGE_PERCENTILE))
+
+    async def take_budget(self) -> bool:
+        key = f"{self.prefix}:{int(time.time() // 60)}"
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, 120)
+                used, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Presupuesto de hedging no disponible ({e}); no se duplica.")
+            return False
+        return used <= settings.OPENAI_HEDGE_BUDGET_PER_MINUTE
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+hedge_policy = HedgePolicy()
+
+
+async def _discard(result):
+    """Cierra la respuesta perdedora si es un stream ya abierto."""
+    close = getattr(result, "close", None)
+    if close is not None:
+        try:
+            await close()
+        except Exception:
+            pass
+
+
+async def race(primary: Callable[[], Awaitable], hedge: Callable[[], Awaitable], delay: float,
+               should_hedge: Callable[[], Awaitable[bool]]):
+    """
+    Lanza `primary()`; si no termina en `delay` segundos y `should_hedge()` lo permite,
+    lanza `hedge()`. Gana la primera respuesta correcta y la otra se cancela (o se cierra,
+    si ya era un stream abierto). Solo falla si fallan las dos, y entonces con el error de la
+    original. Retorna (resultado, hedged, hedge_won).
+    """
+    primary_task = asyncio.ensure_future(primary())
+    tasks = {primary_task}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not await should_hedge():
+            return await primary_task, False, False
+
+        hedge_task = asyncio.ensure_future(hedge())
+        tasks.add(hedge_task)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if task.exception() is None), None)
+            if winner is None:
+                continue
+            for task in done - {winner}:
+                if task.exception() is None:
+                    await _discard(task.result())
+            return winner.result(), True, winner is hedge_task
+        raise primary_task.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
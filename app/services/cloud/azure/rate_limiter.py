@@ -0,0 +1,177 @@
+import time
+import random
+import asyncio
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.cache.redis_config import get_redis_url
+
+# Ambos scripts rellenan los cubos según el tiempo transcurrido (reloj de Redis, común a
+# todos los workers) antes de operar. Estado por deployment en un hash:
+#   req / tok: peticiones y tokens disponibles; ts: última actualización;
+#   blocked_until: fin de la pausa impuesta por un 429 (retry-after).
+# Los números se devuelven como string: Redis truncaría los decimales de Lua.
+REFILL = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'req', 'tok', 'ts', 'blocked_until')
+local req = tonumber(state[1]) or rpm
+local tok = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+local blocked_until = tonumber(state[4]) or 0
+req = math.min(rpm, req + elapsed * rpm / 60)
+tok = math.min(tpm, tok + elapsed * tpm / 60)
+"""
+
+ACQUIRE_SCRIPT = REFILL + """
+local cost = math.min(tonumber(ARGV[3]), tpm)
+local wait = 0
+if blocked_until > now then
+    wait = blocked_until - now
+else
+    if req < 1 then wait = math.max(wait, (1 - req) * 60 / rpm) end
+    if tok < cost then wait = math.max(wait, (cost - tok) * 60 / tpm) end
+    if wait == 0 then
+        req = req - 1
+        tok = tok - cost
+    end
+end
+redis.call('HSET', KEYS[1], 'req', req, 'tok', tok, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 300)
+return tostring(wait)
+"""
+
+# ARGV[3] / ARGV[4]: restantes según las cabeceras (-1 si no vienen); ARGV[5]: segundos de pausa
+OBSERVE_SCRIPT = REFILL + """
+local remaining_requests, remaining_tokens = tonumber(ARGV[3]), tonumber(ARGV[4])
+local pause = tonumber(ARGV[5])
+if remaining_requests >= 0 then req = math.min(req, remaining_requests) end
+if remaining_tokens >= 0 then tok = math.min(tok, remaining_tokens) end
+if pause > 0 then blocked_until = math.max(blocked_until, now + pause) end
+redis.call('HSET', KEYS[1], 'req', req, 'tok', tok, 'ts', now, 'blocked_until', blocked_until)
+redis.call('EXPIRE', KEYS[1], 300)
+return tostring(req)
+"""
+
+
+def _header_number(headers, name: str) -> float:
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return -1
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Segundos de espera indicados por `retry-after-ms` o `retry-after`; None si no vienen."""
+    if headers is None:
+        return None
+    milliseconds = _header_number(headers, "retry-after-ms")
+    if milliseconds >= 0:
+        return milliseconds / 1000
+    seconds = _header_number(headers, "retry-after")
+    return seconds if seconds >= 0 else None
+
+
+class AzureRateLimiter:
+    """
+    Token bucket de peticiones por minuto (RPM) y tokens por minuto (TPM) de un deployment,
+    compartido por todos los workers a través de Redis.
+
+    - `acquire(tokens)` espera hasta que haya cupo para una petición de ese coste
+      (estimación del prompt + `max_tokens`, como hace Azure para su límite de TPM),
+      como mucho `OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS`.
+    - `observe(headers)` ajusta los cubos a `x-ratelimit-remaining-requests/-tokens`
+      de cada respuesta: el servidor manda si ve menos cupo que nosotros.
+    - `pause(seconds)` aplica a todos los workers el `retry-after` de un 429.
+    Si Redis falla, el limitador deja pasar (el 429 y su reintento siguen cubriendo).
+    """
+
+    def __init__(self, deployment: str, rpm: int = None, tpm: int = None, redis_client=None):
+        self.key = f"ratelimit:{deployment}"
+        self.rpm = rpm or settings.OPENAI_RATE_LIMIT_RPM
+        self.tpm = tpm or settings.OPENAI_RATE_LIMIT_TPM
+        self._redis = redis_client
+        self._acquire = None
+        self._observe = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                get_redis_url(),
+                decode_responses=True,
+                socket_timeout=settings.OPENAI_RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.OPENAI_RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+            )
+        return self._redis
+
+    def _scripts(self):
+        if self._acquire is None:
+            self._acquire = self.redis.register_script(ACQUIRE_SCRIPT)
+            self._observe = self.redis.register_script(OBSERVE_SCRIPT)
+        return self._acquire, self._observe
+
+    async def acquire(self, tokens: int, max_wait: float = None) -> bool:
+        """
+        Reserva una petición de `tokens` tokens, esperando cupo como mucho `max_wait` segundos
+        (por defecto `OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS`). Retorna False si no hubo cupo a
+        tiempo (no se reserva nada); True si se reservó o si Redis no está disponible.
+        """
+        max_wait = settings.OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        acquire_script, _ = self._scripts()
+        started = time.monotonic()
+        while True:
+            try:
+                wait = float(await acquire_script(keys=[self.key], args=[self.rpm, self.tpm, tokens]))
+            except Exception as e:
+                logger.warning(f"⚠️ Limitador de Azure OpenAI no disponible ({e}); se continúa sin esperar.")
+                return True
+            if wait <= 0:
+                return True
+            if time.monotonic() - started + wait > max_wait:
+                return False
+            # Jitter para que los workers que esperan no despierten a la vez
+            await asyncio.sleep(wait + random.uniform(0, 0.1))
+
+    async def _update(self, remaining_requests: float = -1, remaining_tokens: float = -1, pause: float = 0):
+        _, observe_script = self._scripts()
+        try:
+            await observe_script(keys=[self.key], args=[self.rpm, self.tpm, remaining_requests, remaining_tokens, pause])
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo actualizar el limitador de Azure OpenAI ({e}).")
+
+    async def observe(self, headers):
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        if remaining_requests >= 0 or remaining_tokens >= 0:
+            await self._update(remaining_requests, remaining_tokens)
+
+    async def pause(self, seconds: float):
+        await self._update(pause=seconds)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+_rate_limiters = {}
+
+
+def get_rate_limiter(deployment: str, rpm: int = None, tpm: int = None) -> Optional[AzureRateLimiter]:
+    """Limitador compartido del deployment; None si `OPENAI_RATE_LIMIT_ENABLED` está desactivado."""
+    if not settings.OPENAI_RATE_LIMIT_ENABLED:
+        return None
+    if deployment not in _rate_limiters:
+        _rate_limiters[deployment] = AzureRateLimiter(deployment, rpm=rpm, tpm=tpm)
+    return _rate_limiters[deployment]
+
+
+async def close_rate_limiters():
+    for limiter in _rate_limiters.values():
+        await limiter.close()
+    _rate_limiters.clear()
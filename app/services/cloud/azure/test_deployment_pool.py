@@ -0,0 +1,115 @@
+"""
+Prueba del pool de deployments contra dos mocks locales de Azure OpenAI (ver `test_mock_openai`):
+reparto entre ambos, failover y apertura del circuit breaker cuando uno falla, recuperación
+tras el cooldown y streaming. No gasta cuota ni necesita Redis.
+
+    python -m app.services.cloud.azure.test_deployment_pool
+
+Sale con código 1 si alguna comprobación falla.
+"""
+import os
+import json
+import asyncio
+import collections
+
+PORTS = (int(os.getenv("MOCK_OPENAI_PORT_A", "8101")), int(os.getenv("MOCK_OPENAI_PORT_B", "8102")))
+COOLDOWN_SECONDS = 2
+WINDOW_SECONDS = 2
+
+# La configuración se lee al importar `app.core.config`: hay que fijarla antes
+os.environ.update(
+    AZURE_OPENAI_DEPLOYMENTS=json.dumps([
+        {"name": "a", "endpoint": f"http://127.0.0.1:{PORTS[0]}", "api_key": "mock", "deployment": "gpt"},
+        {"name": "b", "endpoint": f"http://127.0.0.1:{PORTS[1]}", "api_key": "mock", "deployment": "gpt"},
+    ]),
+    OPENAI_ROUTING="weighted",
+    OPENAI_RATE_LIMIT_ENABLED="false",
+    OPENAI_HEDGING_ENABLED="false",
+    OPENAI_BREAKER_WINDOW_SECONDS=str(WINDOW_SECONDS),
+    OPENAI_BREAKER_COOLDOWN_SECONDS=str(COOLDOWN_SECONDS),
+)
+for name in ("AZURE_OPENAI_DEPLOYMENT_NAME_MAIN", "AZURE_OPENAI_EMBEDDING_DEPLOYMENT",
+             "AZURE_AI_SEARCH_ENDPOINT", "AZURE_AI_SEARCH_INDEX", "AZURE_AI_SEARCH_API_KEY"):
+    os.environ.setdefault(name, "mock")
+
+import uvicorn
+
+from app.services.cloud.azure import azure_openai
+from app.services.cloud.azure.deployments import CLOSED, OPEN, get_deployment_pool, close_deployment_pool
+from app.services.cloud.azure.test_mock_openai import MockBehaviour, create_mock_app
+
+MESSAGES = [{"role": "user", "content": "Hola"}]
+failures = []
+
+
+def check(condition: bool, description: str):
+    print(f"{'✅' if condition else '❌'} {description}")
+    if not condition:
+        failures.append(description)
+
+
+async def ask_many(count: int) -> collections.Counter:
+    """Hace `count` llamadas y cuenta qué deployment respondió cada una."""
+    served = collections.Counter()
+    for _ in range(count):
+        response = await azure_openai.call_with_retry(azure_openai.create_chat_completion, MESSAGES, 50)
+        served[response.choices[0].message.content.split()[-1]] += 1
+    return served
+
+
+async def main():
+    apps = [create_mock_app(MockBehaviour(latency=0.02, jitter=0.0, reply="from {deployment} " + name))
+            for name in ("a", "b")]
+    servers = [uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+               for app, port in zip(apps, PORTS)]
+    tasks = [asyncio.create_task(server.serve()) for server in servers]
+    while not all(server.started for server in servers):
+        await asyncio.sleep(0.05)
+
+    try:
+        pool = get_deployment_pool()
+        breakers = {deployment.name: deployment.breaker for deployment in pool.deployments}
+
+        served = await ask_many(20)
+        print(f"   reparto con ambos sanos: {dict(served)}")
+        check(served["a"] > 0 and served["b"] > 0, "el tráfico se reparte entre los dos deployments")
+
+        # Ventana limpia: los aciertos anteriores no diluyen la tasa de fallos
+        await asyncio.sleep(WINDOW_SECONDS + 0.1)
+        apps[0].state.behaviour.error_rate = 1.0
+        served = await ask_many(40)
+        print(f"   reparto con 'a' fallando: {dict(served)}")
+        check(served["b"] == 40, "con 'a' devolviendo 500 todas las llamadas se sirven desde 'b'")
+        check(breakers["a"].state == OPEN, "el circuit breaker de 'a' se abre")
+        check(breakers["b"].state == CLOSED, "el circuit breaker de 'b' sigue cerrado")
+
+        errors_before = apps[0].state.stats["errors"]
+        await ask_many(10)
+        check(apps[0].state.stats["errors"] == errors_before, "con el breaker abierto 'a' no recibe tráfico")
+
+        apps[0].state.behaviour.error_rate = 0.0
+        await asyncio.sleep(COOLDOWN_SECONDS + 0.1)
+        served = await ask_many(20)
+        print(f"   reparto tras el cooldown: {dict(served)}")
+        check(breakers["a"].state == CLOSED and served["a"] > 0, "tras el cooldown 'a' se recupera y vuelve a recibir tráfico")
+
+        stream = await azure_openai.call_with_retry(azure_openai.create_chat_completion, MESSAGES, 50, stream=True)
+        text = ""
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                text += chunk.choices[0].delta.content
+        check(text.strip().startswith("from gpt"), f"streaming completo: {text.strip()!r}")
+    finally:
+        await close_deployment_pool()
+        for server in servers:
+            server.should_exit = True
+        await asyncio.gather(*tasks)
+
+    if failures:
+        print(f"❌ {len(failures)} comprobaciones fallaron")
+        raise SystemExit(1)
+    print("✅ Pool de deployments OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
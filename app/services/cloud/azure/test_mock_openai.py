@@ -0,0 +1,167 @@
+"""
+Servidor local que imita el endpoint de chat de Azure OpenAI, para probar el pool de
+deployments (reparto, circuit breakers, failover, hedging) sin gastar cuota. Solo para
+pruebas: no entra en la imagen (ver .dockerignore). `test_deployment_pool` lo usa para
+comprobar el failover de forma automática.
+
+    python -m app.services.cloud.azure.test_mock_openai --port 8101 --latency 0.3
+    python -m app.services.cloud.azure.test_mock_openai --port 8102 --error-rate 0.5
+
+Apuntar la app a los mocks:
+
+    AZURE_OPENAI_DEPLOYMENTS='[
+      {"name": "a", "endpoint": "http://localhost:8101", "api_key": "x", "deployment": "gpt"},
+      {"name": "b", "endpoint": "http://localhost:8102", "api_key": "x", "deployment": "gpt"}]'
+
+El comportamiento se cambia en caliente con `POST /mock/behaviour` (mismos campos que
+`MockBehaviour`) y `GET /mock/stats` devuelve los contadores. Soporta streaming (SSE),
+cabeceras `x-ratelimit-remaining-*` y 429 con `retry-after-ms`. Ignora `data_sources`.
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+from dataclasses import dataclass, asdict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class MockBehaviour:
+    latency: float = 0.2             # segundos hasta responder (o hasta el primer chunk)
+    jitter: float = 0.05             # +- aleatorio sobre la latencia
+    slow_rate: float = 0.0           # fracción de respuestas lentas (cola de latencia)
+    slow_latency: float = 3.0
+    error_rate: float = 0.0          # fracción de 500
+    throttle_rate: float = 0.0       # fracción de 429
+    retry_after_ms: int = 1000
+    rpm: int = 1000
+    tpm: int = 1000000
+    reply: str = "Respuesta simulada del deployment {deployment}."
+
+
+def create_mock_app(behaviour: MockBehaviour = None) -> FastAPI:
+    app = FastAPI(title="Mock Azure OpenAI")
+    app.state.behaviour = behaviour or MockBehaviour()
+    app.state.stats = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0, "cancelled": 0}
+    app.state.window = {"started": time.monotonic(), "requests": 0, "tokens": 0}
+
+    def rate_limit_headers(tokens: int) -> dict:
+        window = app.state.window
+        if time.monotonic() - window["started"] >= 60:
+            window.update(started=time.monotonic(), requests=0, tokens=0)
+        window["requests"] += 1
+        window["tokens"] += tokens
+        behaviour = app.state.behaviour
+        return {
+            "x-ratelimit-remaining-requests": str(max(0, behaviour.rpm - window["requests"])),
+            "x-ratelimit-remaining-tokens": str(max(0, behaviour.tpm - window["tokens"])),
+        }
+
+    @app.post("/mock/behaviour")
+    async def update_behaviour(changes: dict):
+        for key, value in changes.items():
+            if hasattr(app.state.behaviour, key):
+                setattr(app.state.behaviour, key, value)
+        return asdict(app.state.behaviour)
+
+    @app.get("/mock/stats")
+    async def stats():
+        return app.state.stats
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        behaviour = app.state.behaviour
+        stats = app.state.stats
+        stats["requests"] += 1
+
+        prompt_tokens = max(1, len(json.dumps(body.get("messages", []), ensure_ascii=False)) // 4)
+        completion_tokens = body.get("max_tokens") or 100
+        headers = rate_limit_headers(prompt_tokens + completion_tokens)
+
+        roll = random.random()
+        if roll < behaviour.throttle_rate:
+            stats["throttled"] += 1
+            return JSONResponse(
+                {"error": {"code": "429", "message": "Rate limit is exceeded (mock)."}},
+                status_code=429,
+                headers={**headers, "retry-after-ms": str(behaviour.retry_after_ms)},
+            )
+        if roll < behaviour.throttle_rate + behaviour.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"code": "500", "message": "Internal error (mock)."}}, status_code=500)
+
+        latency = behaviour.slow_latency if random.random() < behaviour.slow_rate else behaviour.latency
+        try:
+            await asyncio.sleep(max(0.0, latency + random.uniform(-behaviour.jitter, behaviour.jitter)))
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            raise
+
+        text = behaviour.reply.format(deployment=deployment)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(text.split()),
+            "total_tokens": prompt_tokens + len(text.split()),
+            "prompt_tokens_details": {"cached_tokens": prompt_tokens // 2},
+        }
+        stats["ok"] += 1
+
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": deployment,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": text},
+                }],
+                "usage": usage,
+            }, headers=headers)
+
+        def chunk(delta: dict, finish_reason=None, with_usage=False) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": deployment,
+                "choices": [] if with_usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if with_usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            for word in text.split(" "):
+                yield chunk({"content": word + " "})
+                await asyncio.sleep(0.01)
+            yield chunk({}, finish_reason="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({}, with_usage=True)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock local de Azure OpenAI (chat completions).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    for field_name, default in asdict(MockBehaviour()).items():
+        parser.add_argument(f"--{field_name.replace('_', '-')}", type=type(default), default=default)
+    args = vars(parser.parse_args())
+
+    host, port = args.pop("host"), args.pop("port")
+    uvicorn.run(create_mock_app(MockBehaviour(**args)), host=host, port=port, log_level="warning")
@@ -0,0 +1,53 @@
+import threading
+
+from app.core.logging_config import logger
+
+
+class PromptUsageStats:
+    """
+    Acumulado por worker de los tokens de cada llamada de chat, incluidos los
+    `cached_tokens` que Azure sirve desde la caché de prompts (prefijo común ≥ 1024 tokens).
+    Un ratio de caché bajo indica que el prefijo (system prompt + tools) dejó de ser estable.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, usage, label: str = "chat"):
+        """Registra el `usage` de una respuesta (o del último chunk de un stream). Ignora None."""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+        prompt = usage.prompt_tokens or 0
+        completion = usage.completion_tokens or 0
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt
+            self.cached_tokens += cached
+            self.completion_tokens += completion
+
+        ratio = cached / prompt if prompt else 0.0
+        logger.info(f"🧮 Tokens [{label}]: prompt={prompt} cached={cached} ({ratio:.0%}) completion={completion}")
+
+    @property
+    def cache_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cache_ratio": round(self.cache_ratio, 4),
+            }
+
+
+usage_stats = PromptUsageStats()
@@ -0,0 +1,127 @@
+# app/services/db/benchmark_leads.py
+"""
+Throughput and latency benchmark of the `save_user` tool path.
+
+Each simulated tool call goes through the same code as a real model turn: the
+tool registry parses the JSON arguments and runs `save_user` on the database
+executor, then the lead repository is called. It defaults to the
+embedded SQLite backend, so no Azure services are needed:
+
+    python -m app.services.db.benchmark_leads --requests 2000 --concurrency 32
+    python -m app.services.db.benchmark_leads --backend azure_sql --duplicates 0.3
+    python -m app.services.db.benchmark_leads --write-mode write_behind
+    python -m app.services.db.benchmark_leads --email-filter --duplicates 0.5
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import statistics
+
+from app.core.config import settings
+from app.core.logging_config import logger
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_benchmark(requests: int, concurrency: int, duplicates: float, seed: int = 0) -> dict:
+    # Imported here so that the settings overrides from `main` are in place first
+    from app.services.db.pool import database
+    from app.services.db.lead_repository import get_lead_repository
+    from app.services.tools import tool_registry
+    from app.services.cache.registered_emails import get_registered_emails
+
+    rng = random.Random(seed)
+    run_id = f"{os.getpid()}{int(time.time())}"
+    emails = []
+    for i in range(requests):
+        if emails and rng.random() < duplicates:
+            emails.append(rng.choice(emails))
+        else:
+            emails.append(f"lead{i}.{run_id}@example.com")
+
+    await database.run(get_lead_repository().ensure_schema)
+    if settings.LEADS_EMAIL_FILTER_ENABLED:
+        await database.run(get_registered_emails().load, get_lead_repository())
+
+    queue = asyncio.Queue()
+    for i, email in enumerate(emails):
+        queue.put_nowait(json.dumps({"name": f"lead {i}", "email": email}))
+
+    latencies = []
+    statuses = {}
+
+    async def worker():
+        while not queue.empty():
+            arguments = queue.get_nowait()
+            started = time.perf_counter()
+            response = await tool_registry.call("save_user", arguments)
+            latencies.append(time.perf_counter() - started)
+            status = json.loads(response).get("status", "error")
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "backend": settings.LEADS_BACKEND,
+        "write_mode": settings.LEADS_WRITE_MODE,
+        "email_filter": settings.LEADS_EMAIL_FILTER_ENABLED,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        },
+        "statuses": statuses,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of the save_user tool path.")
+    parser.add_argument("--backend", choices=["sqlite", "azure_sql"], default="sqlite")
+    parser.add_argument("--write-mode", choices=["sync", "write_behind"], default="sync")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Fraction of re-submitted emails.")
+    parser.add_argument("--email-filter", action="store_true", help="Use the Bloom + Redis email filter (needs Redis).")
+    parser.add_argument("--sqlite-path", help="SQLite file (defaults to a temporary file).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.WARNING)
+
+    workdir = tempfile.mkdtemp(prefix="angelbot-bench-")
+    settings.LEADS_BACKEND = args.backend
+    settings.LEADS_WRITE_MODE = args.write_mode
+    settings.LEADS_EMAIL_FILTER_ENABLED = args.email_filter
+    settings.LEADS_SQLITE_PATH = args.sqlite_path or os.path.join(workdir, "leads.db")
+    settings.LEADS_SPOOL_PATH = os.path.join(workdir, "leads_spool.db")
+
+    from app.services.db.pool import database
+    from app.services.db.lead_repository import close_lead_repository
+
+    try:
+        result = asyncio.run(run_benchmark(args.requests, args.concurrency, args.duplicates))
+    finally:
+        close_lead_repository()
+        database.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# app/services/db/lead_repository.py
+"""
+Storage backends for registered leads (the `users` table).
+
+`LEADS_BACKEND` selects the implementation:
+
+- ``azure_sql`` (default): Azure SQL through the shared connection pool.
+- ``sqlite``: an embedded SQLite file (`LEADS_SQLITE_PATH`). It needs no outside
+  services, which makes it suitable for offline runs, CI and benchmarks
+  (see `app.services.db.benchmark_leads`).
+
+Every method is blocking. Async code calls them through `database.run(...)`.
+"""
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+import pyodbc
+
+from app.core.config import settings
+from app.services.db.pool import database
+from app.services.db.migrations import apply_migrations
+
+CREATED = "created"
+ALREADY_EXISTS = "already_exists"
+
+
+def is_duplicate_key_error(error: pyodbc.IntegrityError) -> bool:
+    """True if the error is a UNIQUE/PRIMARY KEY violation (SQL Server 2627 / 2601)."""
+    message = str(error)
+    return "2627" in message or "2601" in message
+
+
+class LeadRepository(ABC):
+    """Persistence interface for leads."""
+
+    @abstractmethod
+    def ensure_schema(self):
+        """Create or upgrade the schema. Idempotent."""
+
+    @abstractmethod
+    def insert(self, name: str, email: str) -> str:
+        """
+        Insert one lead.
+
+        Returns
+        -------
+        str
+            `CREATED`, or `ALREADY_EXISTS` if the email is already registered.
+        """
+
+    @abstractmethod
+    def bulk_insert(self, leads: list):
+        """Insert [(name, email)] in one batch, skipping emails that already exist."""
+
+    @abstractmethod
+    def iter_emails(self, batch_size: int = 5000):
+        """Yield every registered email in batches (lists of strings)."""
+
+    def close(self):
+        pass
+
+
+class AzureSqlLeadRepository(LeadRepository):
+    """Leads in Azure SQL, through the shared `ConnectionPool`."""
+
+    def __init__(self, db=database):
+        self.db = db
+
+    def ensure_schema(self):
+        with self.db.pool.connection() as conn:
+            return apply_migrations(conn)
+
+    def insert(self, name: str, email: str) -> str:
+        with self.db.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                # A single round-trip: the UNIQUE constraint on email detects duplicates
+                try:
+                    cursor.execute("INSERT INTO users (name, email) VALUES (?, ?);", (name, email))
+                except pyodbc.IntegrityError as error:
+                    if not is_duplicate_key_error(error):
+                        raise
+                    conn.rollback()
+                    return ALREADY_EXISTS
+            conn.commit()
+        return CREATED
+
+    def bulk_insert(self, leads: list):
+        """
+        One `fast_executemany` batch. Emails already present are skipped. If another
+        writer inserts the same email concurrently, the batch falls back to row-by-row
+        inserts and ignores duplicate-key errors.
+        """
+        params = [(name, email, email) for name, email in leads]
+        query = "INSERT INTO users (name, email) SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM users WHERE email = ?);"
+
+        with self.db.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.fast_executemany = True
+                try:
+                    cursor.executemany(query, params)
+                except pyodbc.IntegrityError:
+                    conn.rollback()
+                    for name, email in leads:
+                        try:
+                            cursor.execute("INSERT INTO users (name, email) VALUES (?, ?);", (name, email))
+                        except pyodbc.IntegrityError as error:
+                            if not is_duplicate_key_error(error):
+                                raise
+                conn.commit()
+            finally:
+                cursor.close()
+
+    def iter_emails(self, batch_size: int = 5000):
+        with self.db.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT email FROM users;")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [row[0] for row in rows]
+
+
+class SqliteLeadRepository(LeadRepository):
+    """
+    Leads in an embedded SQLite file, with one connection per thread.
+
+    Parameters
+    ----------
+    path : str
+        SQLite file. Defaults to `LEADS_SQLITE_PATH`.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE
+    );
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.LEADS_SQLITE_PATH
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def ensure_schema(self):
+        self._conn().executescript(self.SCHEMA)
+
+    def insert(self, name: str, email: str) -> str:
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute("INSERT INTO users (name, email) VALUES (?, ?);", (name, email))
+        except sqlite3.IntegrityError:
+            return ALREADY_EXISTS
+        return CREATED
+
+    def bulk_insert(self, leads: list):
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO users (name, email) VALUES (?, ?);", leads)
+
+    def iter_emails(self, batch_size: int = 5000):
+        cursor = self._conn().execute("SELECT email FROM users;")
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+        finally:
+            cursor.close()
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def create_lead_repository(backend: str = None) -> LeadRepository:
+    backend = (backend or settings.LEADS_BACKEND).lower()
+    if backend == "azure_sql":
+        return AzureSqlLeadRepository()
+    if backend == "sqlite":
+        return SqliteLeadRepository()
+    raise ValueError(f"Unknown LEADS_BACKEND: {backend!r} (expected 'azure_sql' or 'sqlite')")
+
+
+def get_lead_repository() -> LeadRepository:
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:  # double-check
+                _repository = create_lead_repository()
+    return _repository
+
+
+def close_lead_repository():
+    global _repository
+    if _repository is not None:
+        _repository.close()
+        _repository = None
@@ -0,0 +1,244 @@
+# app/services/db/lead_spool.py
+"""
+Write-behind registration of leads.
+
+With `LEADS_WRITE_MODE=write_behind`, `save_user` validates the lead, appends
+it to a durable local SQLite spool and acknowledges right away. A background
+flusher then bulk-inserts pending leads through the lead repository
+(Azure SQL, or SQLite with `LEADS_BACKEND=sqlite`).
+
+Lifecycle of a spooled lead::
+
+    pending --claim--> flushing --insert ok--> done (kept for duplicate checks)
+                           |
+                           +--error--> pending (exponential backoff) ... --> failed
+
+Crash recovery: an acknowledged lead is committed to SQLite before `save_user`
+returns. Leads left in `flushing` by a crashed worker are released back to
+`pending` once their claim lease expires.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+import threading
+
+from app.core.config import settings
+from app.services.db.pool import database
+from app.services.db.lead_repository import get_lead_repository, ALREADY_EXISTS
+from app.services.cache.registered_emails import get_registered_emails
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker may hold a claimed batch before another worker reclaims it.
+CLAIM_LEASE_SECONDS = 120
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 300
+# How long flushed leads are kept to answer duplicate submissions locally.
+DONE_RETENTION_SECONDS = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leads_status_next ON leads (status, next_attempt_at);
+"""
+
+
+class LeadSpool:
+    """
+    Durable SQLite spool shared by all workers on the host.
+
+    Parameters
+    ----------
+    path : str
+        SQLite file. Defaults to `LEADS_SPOOL_PATH`.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.LEADS_SPOOL_PATH
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=FULL;")
+            self._local.conn = conn
+        return conn
+
+    def _connect(self) -> "_Transaction":
+        return _Transaction(self._conn())
+
+    def enqueue(self, name: str, email: str) -> str:
+        """
+        Durably append a lead.
+
+        Returns
+        -------
+        str
+            'queued', or 'already_exists' if the email is already in the spool.
+        """
+        with self._connect() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO leads (name, email, created_at) VALUES (?, ?, ?);",
+                    (name, email, time.time()),
+                )
+            except sqlite3.IntegrityError:
+                return ALREADY_EXISTS
+        return "queued"
+
+    def recover(self) -> int:
+        """Release batches whose claim lease expired (e.g. the worker crashed mid-flush)."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE leads SET status = 'pending', claimed_by = NULL "
+                "WHERE status = 'flushing' AND claimed_at < ?;",
+                (time.time() - CLAIM_LEASE_SECONDS,),
+            )
+        return cursor.rowcount
+
+    def claim_batch(self, limit: int) -> list:
+        """Claim up to `limit` due leads for this worker. Returns [(id, name, email, attempts)]."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE leads SET status = 'flushing', claimed_by = ?, claimed_at = ? "
+                "WHERE id IN (SELECT id FROM leads WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?);",
+                (self.worker_id, now, now, limit),
+            )
+            return conn.execute(
+                "SELECT id, name, email, attempts FROM leads WHERE status = 'flushing' AND claimed_by = ? ORDER BY id;",
+                (self.worker_id,),
+            ).fetchall()
+
+    def mark_done(self, ids: list):
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE leads SET status = 'done', claimed_by = NULL, last_error = NULL WHERE id = ?;",
+                [(lead_id,) for lead_id in ids],
+            )
+
+    def mark_retry(self, rows: list, error: str):
+        """Schedule a retry with exponential backoff, or mark as failed after `LEADS_MAX_ATTEMPTS`."""
+        now = time.time()
+        updates = []
+        for lead_id, _, _, attempts in rows:
+            attempts += 1
+            status = "failed" if attempts >= settings.LEADS_MAX_ATTEMPTS else "pending"
+            delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+            updates.append((status, attempts, now + delay, error[:500], lead_id))
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE leads SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, claimed_by = NULL "
+                "WHERE id = ?;",
+                updates,
+            )
+
+    def purge_done(self) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM leads WHERE status = 'done' AND created_at < ?;",
+                (time.time() - DONE_RETENTION_SECONDS,),
+            )
+        return cursor.rowcount
+
+
+class _Transaction:
+    """`with` block running as one IMMEDIATE SQLite transaction on a per-thread connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE;")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK;" if exc_type else "COMMIT;")
+        return False
+
+
+class LeadFlusher:
+    """Background task draining the spool into the lead repository."""
+
+    def __init__(self, spool: LeadSpool):
+        self.spool = spool
+        self._task = None
+
+    async def flush_once(self) -> int:
+        rows = await asyncio.to_thread(self.spool.claim_batch, settings.LEADS_FLUSH_BATCH_SIZE)
+        if not rows:
+            return 0
+        try:
+            leads = [(name, email) for _, name, email, _ in rows]
+            await database.run(get_lead_repository().bulk_insert, leads)
+        except Exception as e:
+            logger.warning("Lead flush failed for %s leads, will retry: %s", len(rows), e)
+            await asyncio.to_thread(self.spool.mark_retry, rows, str(e))
+            return 0
+        await asyncio.to_thread(self.spool.mark_done, [row[0] for row in rows])
+        if settings.LEADS_EMAIL_FILTER_ENABLED:
+            await asyncio.to_thread(get_registered_emails().add, *(email for _, email in leads))
+        logger.info("Flushed %s spooled leads", len(rows))
+        return len(rows)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.spool.recover)
+                # Drain while there are full batches, then wait for the next interval
+                while await self.flush_once() >= settings.LEADS_FLUSH_BATCH_SIZE:
+                    pass
+                await asyncio.to_thread(self.spool.purge_done)
+            except Exception:
+                logger.exception("Lead flusher iteration failed")
+            await asyncio.sleep(settings.LEADS_FLUSH_INTERVAL_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Best-effort final drain; whatever is left stays in the spool for the next start
+        try:
+            await self.flush_once()
+        except Exception:
+            logger.exception("Final lead flush failed")
+
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+def get_lead_spool() -> LeadSpool:
+    global _spool
+    if _spool is None:
+        with _spool_lock:
+            if _spool is None:  # double-check
+                _spool = LeadSpool()
+    return _spool
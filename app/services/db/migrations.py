@@ -0,0 +1,112 @@
+# app/services/db/migrations.py
+"""
+Versioned schema migrations for the Azure SQL database.
+
+Migrations run once, either at application startup (`DB_MIGRATE_ON_STARTUP`)
+or from the command line:
+
+    python -m app.services.db.migrations
+
+Applied versions are recorded in the `schema_version` table. An application
+lock (`sp_getapplock`) serializes concurrent runs, so several workers booting
+at the same time apply each migration exactly once.
+"""
+import logging
+
+from app.services.db.pool import database
+
+logger = logging.getLogger(__name__)
+
+# (version, description, SQL). Append new migrations; never edit applied ones.
+MIGRATIONS = [
+    (
+        1,
+        "create users table",
+        """
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='users' AND xtype='U')
+        CREATE TABLE users (
+            id INT PRIMARY KEY IDENTITY(1,1),
+            name NVARCHAR(255) NOT NULL,
+            email NVARCHAR(255) UNIQUE NOT NULL
+        );
+        """,
+    ),
+]
+
+LOCK_QUERY = """
+SET NOCOUNT ON;
+DECLARE @result INT;
+EXEC @result = sp_getapplock
+    @Resource = 'angelbot_schema_migrations',
+    @LockMode = 'Exclusive',
+    @LockOwner = 'Transaction',
+    @LockTimeout = 60000;
+SELECT @result;
+"""
+
+CREATE_VERSION_TABLE_QUERY = """
+IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='schema_version' AND xtype='U')
+CREATE TABLE schema_version (
+    version INT PRIMARY KEY,
+    description NVARCHAR(255) NOT NULL,
+    applied_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+);
+"""
+
+
+def apply_migrations(conn) -> int:
+    """
+    Apply every pending migration inside a single transaction.
+
+    Parameters
+    ----------
+    conn : pyodbc.Connection
+        Open connection (autocommit disabled).
+
+    Returns
+    -------
+    int
+        The schema version after the run.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LOCK_QUERY)
+        if cursor.fetchone()[0] < 0:
+            raise RuntimeError("Could not acquire the schema migration lock")
+
+        cursor.execute(CREATE_VERSION_TABLE_QUERY)
+        cursor.execute("SELECT ISNULL(MAX(version), 0) FROM schema_version;")
+        current = cursor.fetchone()[0]
+
+        for version, description, sql in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info("Applying schema migration %s: %s", version, description)
+            cursor.execute(sql)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?);",
+                (version, description),
+            )
+            current = version
+
+        conn.commit()
+        return current
+    finally:
+        cursor.close()
+
+
+async def migrate() -> int:
+    """Run pending migrations on the database executor."""
+    version = await database.execute(apply_migrations)
+    logger.info("Database schema at version %s", version)
+    return version
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(migrate())
+    finally:
+        database.close()
@@ -0,0 +1,213 @@
+# app/services/db/pool.py
+import time
+import queue
+import asyncio
+import logging
+import threading
+from functools import partial
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import pyodbc
+
+from app.core.config import settings
+from app.services.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection can no longer be trusted and must be discarded.
+BROKEN_CONNECTION_ERRORS = (pyodbc.OperationalError, pyodbc.InterfaceError)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class _PooledConnection:
+    def __init__(self, conn: pyodbc.Connection):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of pyodbc connections to Azure SQL.
+
+    Parameters
+    ----------
+    factory : callable
+        Opens a new connection. Defaults to `connection.get_connection`.
+    max_size : int
+        Maximum number of open connections (idle + checked out).
+    max_lifetime : float
+        Seconds after which a connection is closed and replaced, so that
+        long-lived sockets are recycled (gateway failovers, credential rotation).
+    health_check_idle : float
+        Connections idle for longer than this are pinged with `SELECT 1`
+        before being handed out.
+    checkout_timeout : float
+        Seconds to wait for a free slot before raising `PoolTimeout`.
+    """
+
+    def __init__(
+        self,
+        factory=connection.get_connection,
+        max_size: int = None,
+        max_lifetime: float = None,
+        health_check_idle: float = None,
+        checkout_timeout: float = None,
+    ):
+        self.factory = factory
+        self.max_size = max_size or settings.DB_POOL_SIZE
+        self.max_lifetime = max_lifetime or settings.DB_POOL_MAX_LIFETIME_SECONDS
+        self.health_check_idle = health_check_idle or settings.DB_POOL_HEALTHCHECK_IDLE_SECONDS
+        self.checkout_timeout = checkout_timeout or settings.DB_POOL_TIMEOUT_SECONDS
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._closed = False
+
+    def _expired(self, pooled: _PooledConnection) -> bool:
+        return time.monotonic() - pooled.created_at > self.max_lifetime
+
+    def _healthy(self, pooled: _PooledConnection) -> bool:
+        if time.monotonic() - pooled.last_used < self.health_check_idle:
+            return True
+        try:
+            with pooled.conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+                cursor.fetchone()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _discard(self, pooled: _PooledConnection):
+        try:
+            pooled.conn.close()
+        except pyodbc.Error:
+            pass
+
+    def acquire(self) -> _PooledConnection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolTimeout(f"No database connection available after {self.checkout_timeout}s")
+
+        try:
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()
+                except queue.Empty:
+                    return _PooledConnection(self.factory())
+
+                if self._expired(pooled) or not self._healthy(pooled):
+                    self._discard(pooled)
+                    continue
+                return pooled
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, pooled: _PooledConnection, broken: bool = False):
+        """
+        Return a connection to the pool. Any open transaction is rolled back first,
+        so the next borrower never inherits uncommitted work or its locks.
+        """
+        try:
+            if broken or self._closed or self._expired(pooled):
+                self._discard(pooled)
+                return
+            try:
+                pooled.conn.rollback()
+            except pyodbc.Error:
+                self._discard(pooled)
+                return
+            pooled.last_used = time.monotonic()
+            self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of the block.
+
+        Uncommitted work is rolled back when the block exits (see `release`), so
+        callers must commit explicitly. Connections that fail with a connectivity
+        error are discarded instead of returned.
+        """
+        pooled = self.acquire()
+        broken = False
+        try:
+            yield pooled.conn
+        except BROKEN_CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class AsyncDatabase:
+    """
+    Async facade over `ConnectionPool`.
+
+    Blocking pyodbc work runs on a dedicated thread pool (sized like the
+    connection pool), so database calls never block the event loop.
+    The pool is created lazily on first use.
+    """
+
+    def __init__(self, pool_factory=ConnectionPool):
+        self._pool_factory = pool_factory
+        self._pool = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:  # double-check
+                    self._pool = self._pool_factory()
+        return self._pool
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=settings.DB_POOL_SIZE,
+                        thread_name_prefix="db",
+                    )
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking callable on the database executor and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+
+    async def execute(self, fn, *args, **kwargs):
+        """Run `fn(conn, *args, **kwargs)` with a pooled connection on the database executor."""
+        def run_with_connection():
+            with self.pool.connection() as conn:
+                return fn(conn, *args, **kwargs)
+
+        return await self.run(run_with_connection)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+
+database = AsyncDatabase()
@@ -0,0 +1,201 @@
+"""
+Artefacto binario del índice de precios.
+
+Formato (little-endian, secciones alineadas a 8 bytes):
+    header   : magic "AGPX", versión (u32), nº de secciones (u32)
+    tabla    : (offset u64, longitud u64) por sección, en el orden de SECTIONS
+    secciones: tablas de strings (u32 count + u32 offsets[count + 1] + bytes utf-8)
+               o arrays numéricos planos (u32 / f32 / u16 / f64)
+
+Los workers lo abren con mmap de solo lectura: las páginas las comparte el page cache
+entre procesos y los arrays se leen directamente con memoryview, sin parsear nada.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import tempfile
+from array import array
+
+from app.services.prices.catalog import PriceCatalog, PRICE_FIELDS, price_value
+from app.services.prices.search import InvertedIndex
+from app.services.prices.fuzzy import TrigramIndex
+
+MAGIC = b"AGPX"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+SECTION = struct.Struct("<QQ")
+
+# (nombre, tipo): "s" = tabla de strings, otro = typecode de array
+SECTIONS = (
+    ("results", "s"),
+    ("terms", "s"),
+    ("offsets", "I"),
+    ("doc_ids", "I"),
+    ("weights", "f"),
+    ("doc_lengths", "f"),
+    ("grams", "s"),
+    ("gram_offsets", "I"),
+    ("gram_term_ids", "I"),
+    ("gram_counts", "H"),
+    ("price_min", "d"),
+    ("price_max", "d"),
+)
+
+
+class StringTable:
+    """Secuencia de strings sobre un buffer; decodifica solo el elemento que se pide."""
+
+    def __init__(self, buf: memoryview):
+        (count,) = struct.unpack_from("<I", buf)
+        end = 4 + 4 * (count + 1)
+        self._offsets = buf[4:end].cast("I")
+        self._data = buf[end:]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self._data[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+
+class ResultTable:
+    """Resultados proyectados: JSON por fila + precios numéricos en arrays paralelos."""
+
+    def __init__(self, strings: StringTable, price_min, price_max):
+        self._strings = strings
+        self._price_min = price_min
+        self._price_max = price_max
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __getitem__(self, i):
+        result = json.loads(self._strings[i])
+        for field, prices in zip(PRICE_FIELDS, (self._price_min, self._price_max)):
+            value = price_value(prices[i])
+            if value is not None:
+                result[field] = value
+        return result
+
+
+def _pack_strings(strings) -> bytes:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    return struct.pack("<I", len(encoded)) + offsets.tobytes() + b"".join(encoded)
+
+
+def _section_payloads(catalog: PriceCatalog) -> dict:
+    results = [catalog.results[i] for i in range(len(catalog))]
+    nan = float("nan")
+    search_index = catalog.search_index
+    fuzzy_index = catalog.fuzzy_index
+
+    return {
+        "results": [
+            json.dumps({k: v for k, v in result.items() if k not in PRICE_FIELDS}, ensure_ascii=False)
+            for result in results
+        ],
+        "terms": list(search_index.terms),
+        "offsets": search_index.offsets,
+        "doc_ids": search_index.doc_ids,
+        "weights": search_index.weights,
+        "doc_lengths": search_index.doc_lengths,
+        "grams": list(fuzzy_index.grams),
+        "gram_offsets": fuzzy_index.offsets,
+        "gram_term_ids": fuzzy_index.term_ids,
+        "gram_counts": fuzzy_index.gram_counts,
+        "price_min": array("d", [result.get("price_min", nan) for result in results]),
+        "price_max": array("d", [result.get("price_max", nan) for result in results]),
+    }
+
+
+def serialize_catalog(catalog: PriceCatalog) -> bytes:
+    payloads = _section_payloads(catalog)
+    blobs = []
+    for name, kind in SECTIONS:
+        value = payloads[name]
+        blobs.append(_pack_strings(value) if kind == "s" else array(kind, value).tobytes())
+
+    position = HEADER.size + SECTION.size * len(SECTIONS)
+    table = []
+    body = bytearray()
+    for blob in blobs:
+        padding = -(position + len(body)) % 8
+        body.extend(b"\0" * padding)
+        table.append(SECTION.pack(position + len(body), len(blob)))
+        body.extend(blob)
+
+    return HEADER.pack(MAGIC, VERSION, len(SECTIONS)) + b"".join(table) + bytes(body)
+
+
+def write_artifact(catalog: PriceCatalog, path: str):
+    """Escribe el artefacto de forma atómica (archivo temporal + rename)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(serialize_catalog(catalog))
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def publish_artifact(tmp_path: str, path: str) -> bool:
+    """
+    Publica en `path` un artefacto ya escrito en `tmp_path` (mismo directorio), solo si no existe.
+    Se usa `os.link` (atómico y falla si el destino existe) para que, si varios workers
+    lo descargan a la vez, todos terminen mapeando el mismo inode.
+    Retorna True si este proceso fue quien lo publicó.
+    """
+    try:
+        os.link(tmp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.unlink(tmp_path)
+
+
+def load_artifact(path: str, etag: str = None, last_modified=None) -> PriceCatalog:
+    """Mapea el artefacto en memoria (solo lectura) y construye el catálogo sobre él."""
+    if sys.byteorder != "little":
+        raise RuntimeError("El artefacto de precios solo se soporta en plataformas little-endian.")
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buf = memoryview(mapped)
+    magic, version, count = HEADER.unpack_from(buf)
+    if magic != MAGIC or version != VERSION or count != len(SECTIONS):
+        raise ValueError(f"Artefacto de precios inválido o de otra versión: {path}")
+
+    sections = {}
+    for i, (name, kind) in enumerate(SECTIONS):
+        offset, length = SECTION.unpack_from(buf, HEADER.size + i * SECTION.size)
+        view = buf[offset:offset + length]
+        sections[name] = StringTable(view) if kind == "s" else view.cast(kind)
+
+    search_index = InvertedIndex(
+        sections["terms"],
+        sections["offsets"],
+        sections["doc_ids"],
+        sections["weights"],
+        sections["doc_lengths"],
+    )
+    fuzzy_index = TrigramIndex(
+        sections["grams"],
+        sections["gram_offsets"],
+        sections["gram_term_ids"],
+        sections["gram_counts"],
+    )
+    results = ResultTable(sections["results"], sections["price_min"], sections["price_max"])
+    return PriceCatalog(results, search_index, fuzzy_index, etag=etag, last_modified=last_modified)
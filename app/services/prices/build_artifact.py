@@ -0,0 +1,57 @@
+"""
+Compila la lista de precios (CSV) en el artefacto binario que cargan los workers.
+
+Uso:
+    python -m app.services.prices.build_artifact --csv precios.csv --output price_index.bin
+    python -m app.services.prices.build_artifact --from-blob --output price_index.bin --upload
+
+Con --upload el artefacto se publica junto al CSV, en el blob `PRICE_INDEX_BLOB`
+(por defecto `<PRICE_LIST_BLOB>.idx`), que es el mismo que buscan los workers.
+"""
+
+import io
+import asyncio
+import argparse
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.prices.catalog import PriceCatalog
+from app.services.prices.artifact import write_artifact
+from app.services.cloud.azure.azure_blob_async import get_async_blob_service, close_async_blob_service
+
+
+async def build(args):
+    blob_service = get_async_blob_service()
+    try:
+        if args.csv:
+            df = pd.read_csv(args.csv)
+        else:
+            content, _ = await blob_service.download_blob_if_modified()
+            df = pd.read_csv(io.BytesIO(content))
+
+        catalog = PriceCatalog.from_dataframe(df)
+        write_artifact(catalog, args.output)
+        logger.info(
+            f"✅ Artefacto de precios generado en '{args.output}': {len(catalog)} filas, "
+            f"{len(catalog.search_index.terms)} términos."
+        )
+
+        if args.upload:
+            await blob_service.upload_blob(settings.PRICE_LIST_CONTAINER, settings.PRICE_INDEX_BLOB, args.output)
+    finally:
+        await close_async_blob_service()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compila la lista de precios en un índice binario.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="Ruta local del CSV de precios.")
+    source.add_argument("--from-blob", action="store_true", help="Descarga el CSV desde PRICE_LIST_BLOB.")
+    parser.add_argument("--output", default="price_index.bin", help="Ruta del artefacto a generar.")
+    parser.add_argument("--upload", action="store_true", help="Publica el artefacto en Blob Storage.")
+    asyncio.run(build(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import pandas as pd
+
+from app.services.prices.text import parse_price_range
+from app.services.prices.search import InvertedIndex, query_terms
+from app.services.prices.fuzzy import TrigramIndex
+
+# Campos que se devuelven al modelo (el resto solo sirve para indexar)
+RESULT_FIELDS = ["procedure_name", "price", "currency", "doctor", "description", "price_min", "price_max"]
+PRICE_FIELDS = ("price_min", "price_max")
+DESCRIPTION_MAX_CHARS = 160
+
+
+def _is_missing(value) -> bool:
+    return value is None or value == "" or (isinstance(value, float) and value != value)
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0].rstrip(" ,.;:") + "…"
+
+
+def price_value(value):
+    """Precio numérico listo para serializar: int si no tiene decimales, None si falta."""
+    if _is_missing(value):
+        return None
+    return int(value) if float(value).is_integer() else value
+
+
+def project_record(record: dict) -> dict:
+    """Proyección compacta de una fila: solo los campos útiles para el modelo, sin vacíos."""
+    result = {}
+    for field in RESULT_FIELDS:
+        value = record.get(field)
+        if _is_missing(value):
+            continue
+        if field == "description":
+            value = _shorten(str(value).strip(), DESCRIPTION_MAX_CHARS)
+        elif field in PRICE_FIELDS:
+            value = price_value(value)
+        result[field] = value
+    return result
+
+
+class PriceCatalog:
+    """
+    Snapshot inmutable de la lista de precios ya indexada.
+    Se construye una vez por refresco (desde el CSV o desde el artefacto binario)
+    y se comparte entre todas las búsquedas.
+    """
+
+    def __init__(self, results, search_index: InvertedIndex, fuzzy_index: TrigramIndex, etag: str = None, last_modified=None):
+        self.results = results
+        self.search_index = search_index
+        self.fuzzy_index = fuzzy_index
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def from_records(cls, records: list, etag: str = None, last_modified=None) -> "PriceCatalog":
+        search_index = InvertedIndex.build(records)
+        return cls(
+            [project_record(record) for record in records],
+            search_index,
+            TrigramIndex.build(search_index.terms),
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, etag: str = None, last_modified=None) -> "PriceCatalog":
+        # Pre-parseamos los rangos de precio a columnas numéricas (una sola vez por refresco)
+        df = df.copy()
+        price_ranges = [parse_price_range(value) for value in df['price']]
+        df['price_min'] = [low for low, _ in price_ranges]
+        df['price_max'] = [high for _, high in price_ranges]
+        return cls.from_records(df.to_dict(orient="records"), etag=etag, last_modified=last_modified)
+
+    def __len__(self):
+        return len(self.results)
+
+    def search(self, query: str, top_k: int = 10) -> list:
+        """
+        Retorna la proyección compacta de las `top_k` filas más relevantes, ordenadas por score BM25.
+        Los tokens sin coincidencia exacta ni por prefijo se corrigen con el índice de trigramas.
+        """
+        tokens = query_terms(query)
+        if not tokens:
+            return []
+
+        groups = [self.search_index.expand(token) or self.fuzzy_index.expand(token) for token in tokens]
+        return [self.results[doc_id] for doc_id, _ in self.search_index.search_terms(groups, top_k=top_k)]
@@ -0,0 +1,85 @@
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+# Similitud de Jaccard mínima entre conjuntos de trigramas para aceptar una corrección
+SIMILARITY_THRESHOLD = 0.45
+MIN_FUZZY_LENGTH = 4
+MAX_FUZZY_EXPANSIONS = 3
+# Las correcciones puntúan por debajo de las coincidencias exactas y por prefijo
+FUZZY_WEIGHT = 0.5
+
+
+def trigrams(term: str) -> set:
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Índice de trigramas de caracteres sobre el vocabulario del índice invertido.
+
+    Permite corregir tokens mal escritos ("rinoplatia" -> "rinoplastia") buscando los
+    términos del vocabulario con mayor similitud de trigramas. Igual que `InvertedIndex`,
+    guarda los postings en formato CSR: los ids de término del trigrama `grams[i]` están en
+    `term_ids[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, grams, offsets, term_ids, gram_counts):
+        self.grams = grams
+        self.offsets = offsets
+        self.term_ids = term_ids
+        self.gram_counts = gram_counts
+
+    @classmethod
+    def build(cls, terms) -> "TrigramIndex":
+        postings = defaultdict(list)
+        gram_counts = array("H")
+
+        for term_id, term in enumerate(terms):
+            grams = trigrams(term)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(term_id)
+
+        grams = sorted(postings)
+        offsets = array("I", [0])
+        term_ids = array("I")
+        for gram in grams:
+            term_ids.extend(postings[gram])
+            offsets.append(len(term_ids))
+
+        return cls(grams, offsets, term_ids, gram_counts)
+
+    def _gram_id(self, gram: str):
+        i = bisect_left(self.grams, gram)
+        if i < len(self.grams) and self.grams[i] == gram:
+            return i
+        return None
+
+    def similar(self, token: str, threshold: float = SIMILARITY_THRESHOLD, limit: int = MAX_FUZZY_EXPANSIONS) -> list:
+        """Retorna [(term_id, similitud)] de los términos más parecidos a `token`."""
+        if len(token) < MIN_FUZZY_LENGTH:
+            return []
+
+        query_grams = trigrams(token)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            gram_id = self._gram_id(gram)
+            if gram_id is None:
+                continue
+            for p in range(self.offsets[gram_id], self.offsets[gram_id + 1]):
+                shared[self.term_ids[p]] += 1
+
+        candidates = []
+        for term_id, common in shared.items():
+            similarity = common / (len(query_grams) + self.gram_counts[term_id] - common)
+            if similarity >= threshold:
+                candidates.append((term_id, similarity))
+
+        candidates.sort(key=lambda item: (-item[1], item[0]))
+        return candidates[:limit]
+
+    def expand(self, token: str) -> list:
+        """Expansión difusa de un token en el formato de grupos de `InvertedIndex.search_terms`."""
+        return [(term_id, FUZZY_WEIGHT * similarity) for term_id, similarity in self.similar(token)]
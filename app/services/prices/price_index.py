@@ -0,0 +1,184 @@
+import io
+import os
+import glob
+import asyncio
+import hashlib
+import tempfile
+import pandas as pd
+from azure.core.exceptions import ResourceNotFoundError
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.prices.catalog import PriceCatalog
+from app.services.prices.artifact import load_artifact, publish_artifact
+from app.services.cloud.azure.azure_blob_async import get_async_blob_service
+
+ARTIFACT_PREFIX = "price_index-"
+# Mientras no haya ninguna versión cargada se reintenta con más frecuencia
+RETRY_SECONDS = 15
+
+
+class PriceListIndex:
+    """
+    Índice de precios en memoria, compartido por todo el proceso.
+
+    - Se carga una vez al arrancar la app; si falla, el refresco en segundo plano reintenta.
+    - Si hay un artefacto precompilado (`PRICE_INDEX_BLOB`, por defecto `<PRICE_LIST_BLOB>.idx`;
+      ver `build_artifact`), se descarga una sola vez a disco y se mapea con mmap: todos los
+      workers comparten las mismas páginas y el arranque no parsea el CSV. Si no existe, se usa el CSV como antes.
+    - Un task en segundo plano revalida el blob con su ETag y solo lo vuelve a
+      descargar e indexar cuando ha cambiado. El CSV se lee a través de la caché en disco,
+      así que un corte de Azure Storage no deja al proceso sin precios. Las descargas usan el servicio de blobs
+      asíncrono, así que nunca bloquean el event loop.
+    - Las búsquedas leen el snapshot actual sin hacer I/O de red.
+    """
+
+    def __init__(self, container_name=None, blob_name=None, artifact_blob_name=None, refresh_seconds=None):
+        self.container_name = container_name
+        self.blob_name = blob_name
+        self.artifact_blob_name = artifact_blob_name or settings.PRICE_INDEX_BLOB
+        self.refresh_seconds = refresh_seconds or settings.PRICE_LIST_REFRESH_SECONDS
+        self._catalog = None
+        self._refresh_lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._catalog is not None
+
+    @property
+    def catalog(self) -> PriceCatalog:
+        if self._catalog is None:
+            raise RuntimeError("La lista de precios todavía no está disponible.")
+        return self._catalog
+
+    async def refresh(self) -> bool:
+        """
+        Revalida la lista de precios. Retorna True si se cargó una versión nueva.
+        """
+        async with self._refresh_lock:
+            if self.artifact_blob_name:
+                try:
+                    return await self._refresh_from_artifact()
+                except ResourceNotFoundError:
+                    logger.info(f"ℹ️ Artefacto '{self.artifact_blob_name}' no encontrado, se usa el CSV de precios.")
+            return await self._refresh_from_csv()
+
+    async def _refresh_from_csv(self) -> bool:
+        # Lectura a través de la caché en disco: si Azure no responde se usa la última copia conocida
+        content, properties = await get_async_blob_service().read_blob_cached(
+            container_name=self.container_name,
+            blob_name=self.blob_name,
+        )
+        current = self._catalog
+        if current is not None and current.etag == properties.etag:
+            return False
+
+        def build():
+            df = pd.read_csv(io.BytesIO(content))
+            return PriceCatalog.from_dataframe(df, etag=properties.etag, last_modified=properties.last_modified)
+
+        # El parseo y la indexación son CPU: fuera del event loop
+        self._set_catalog(await asyncio.to_thread(build))
+        return True
+
+    def _artifact_path(self, etag: str) -> str:
+        digest = hashlib.sha1(etag.encode()).hexdigest()[:16]
+        return os.path.join(settings.PRICE_INDEX_LOCAL_DIR, f"{ARTIFACT_PREFIX}{digest}.bin")
+
+    async def _refresh_from_artifact(self) -> bool:
+        blob_service = get_async_blob_service()
+        properties = await blob_service.get_blob_properties(
+            container_name=self.container_name,
+            blob_name=self.artifact_blob_name,
+        )
+        current = self._catalog
+        if current is not None and current.etag == properties.etag:
+            return False
+
+        # Otro worker puede haberlo descargado ya: en ese caso solo lo mapeamos
+        tmp_path = None
+        if not await asyncio.to_thread(os.path.exists, self._artifact_path(properties.etag)):
+            tmp_path = await asyncio.to_thread(self._new_tmp_path)
+            try:
+                properties = await blob_service.download_to_file(
+                    tmp_path,
+                    container_name=self.container_name,
+                    blob_name=self.artifact_blob_name,
+                )
+            except Exception:
+                await asyncio.to_thread(os.unlink, tmp_path)
+                raise
+
+        def install():
+            path = self._artifact_path(properties.etag)
+            if tmp_path is not None:
+                publish_artifact(tmp_path, path)
+            catalog = load_artifact(path, etag=properties.etag, last_modified=properties.last_modified)
+            self._remove_stale_artifacts(keep=path)
+            return catalog
+
+        # Publicar, mapear e indexar y limpiar son disco y CPU: fuera del event loop, como el CSV
+        self._set_catalog(await asyncio.to_thread(install))
+        return True
+
+    def _new_tmp_path(self) -> str:
+        os.makedirs(settings.PRICE_INDEX_LOCAL_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=settings.PRICE_INDEX_LOCAL_DIR, suffix=".tmp")
+        os.close(fd)
+        return tmp_path
+
+    def _remove_stale_artifacts(self, keep: str):
+        # Los procesos que aún mapeen un artefacto viejo conservan su inode hasta soltarlo
+        for path in glob.glob(os.path.join(settings.PRICE_INDEX_LOCAL_DIR, f"{ARTIFACT_PREFIX}*.bin")):
+            if path != keep:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _set_catalog(self, catalog: PriceCatalog):
+        self._catalog = catalog
+        logger.info(
+            f"💰 Lista de precios cargada: {len(catalog)} filas "
+            f"(etag={catalog.etag}, last_modified={catalog.last_modified})."
+        )
+
+    def search(self, query: str, top_k: int = 10) -> list:
+        return self.catalog.search(query, top_k=top_k)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds if self._catalog is not None else RETRY_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"❌ Error refrescando la lista de precios: {e}")
+
+    async def start(self):
+        # Sin límite, un Blob Storage colgado en frío (sin copia en caché) bloquearía el arranque;
+        # si no llega a tiempo se sirve igualmente y el task en segundo plano hace la carga.
+        try:
+            await asyncio.wait_for(self.refresh(), timeout=settings.BLOB_CACHE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"⚠️ La lista de precios no cargó en {settings.BLOB_CACHE_TIMEOUT_SECONDS}s; "
+                f"se reintenta en segundo plano."
+            )
+        except Exception as e:
+            logger.error(f"❌ No se pudo precargar la lista de precios: {e}")
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+price_index = PriceListIndex()
@@ -0,0 +1,157 @@
+import math
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from app.services.prices.text import normalize_text
+
+# Parámetros estándar de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Peso de cada campo al contar la frecuencia de un término (BM25F simplificado)
+FIELD_WEIGHTS = {
+    "procedure_name": 3.0,
+    "synonyms": 2.0,
+    "raw_text": 1.0,
+}
+
+# Las coincidencias por prefijo puntúan menos que las exactas
+PREFIX_WEIGHT = 0.6
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_EXPANSIONS = 50
+
+# Palabras vacías que el modelo suele incluir en la query ("precio de la rinoplastia")
+STOPWORDS = frozenset({
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los", "para", "por", "un", "una", "y",
+    "cuanto", "cuesta", "precio", "precios", "coste", "costo", "tratamiento",
+    "the", "of", "for", "and", "price", "cost", "how", "much",
+})
+
+
+def tokenize(text) -> list:
+    if text is None or (isinstance(text, float) and math.isnan(text)):
+        return []
+    return normalize_text(str(text)).split()
+
+
+def query_terms(query: str) -> list:
+    """Tokens únicos de la query, sin palabras vacías (salvo que sea todo lo que hay)."""
+    tokens = list(dict.fromkeys(tokenize(query)))
+    meaningful = [t for t in tokens if t not in STOPWORDS]
+    return meaningful or tokens
+
+
+class InvertedIndex:
+    """
+    Índice invertido de términos -> documentos con ranking BM25.
+
+    Los postings se guardan en formato CSR (arrays planos): los documentos del término
+    `terms[i]` están en `doc_ids[offsets[i]:offsets[i + 1]]` con su frecuencia ponderada
+    en `weights`. `terms` está ordenado, así que el lookup exacto y por prefijo es una
+    búsqueda binaria.
+    """
+
+    def __init__(self, terms, offsets, doc_ids, weights, doc_lengths):
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.doc_lengths = doc_lengths
+        self.doc_count = len(doc_lengths)
+        self.avg_doc_length = (sum(doc_lengths) / self.doc_count) if self.doc_count else 0.0
+
+    @classmethod
+    def build(cls, records: list, field_weights: dict = None) -> "InvertedIndex":
+        field_weights = field_weights or FIELD_WEIGHTS
+        postings = defaultdict(dict)
+        doc_lengths = array("f")
+
+        for doc_id, record in enumerate(records):
+            length = 0.0
+            for field, weight in field_weights.items():
+                for token in tokenize(record.get(field)):
+                    postings[token][doc_id] = postings[token].get(doc_id, 0.0) + weight
+                    length += weight
+            doc_lengths.append(length)
+
+        terms = sorted(postings)
+        offsets = array("I", [0])
+        doc_ids = array("I")
+        weights = array("f")
+        for term in terms:
+            for doc_id, tf in sorted(postings[term].items()):
+                doc_ids.append(doc_id)
+                weights.append(tf)
+            offsets.append(len(doc_ids))
+
+        return cls(terms, offsets, doc_ids, weights, doc_lengths)
+
+    def term_id(self, term: str):
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return i
+        return None
+
+    def expand(self, token: str) -> list:
+        """Términos del vocabulario que coinciden con `token`: [(term_id, peso)]."""
+        matches = []
+        exact = self.term_id(token)
+        if exact is not None:
+            matches.append((exact, 1.0))
+
+        if len(token) >= MIN_PREFIX_LENGTH:
+            i = bisect_left(self.terms, token)
+            while i < len(self.terms) and len(matches) < MAX_PREFIX_EXPANSIONS:
+                term = self.terms[i]
+                if not term.startswith(token):
+                    break
+                if i != exact:
+                    matches.append((i, PREFIX_WEIGHT))
+                i += 1
+
+        return matches
+
+    def _idf(self, term_id: int) -> float:
+        df = self.offsets[term_id + 1] - self.offsets[term_id]
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, tokens: list, top_k: int = 10) -> list:
+        """Busca los tokens de la query con coincidencia exacta y por prefijo."""
+        return self.search_terms([self.expand(token) for token in tokens], top_k=top_k)
+
+    def search_terms(self, groups: list, top_k: int = 10) -> list:
+        """
+        Retorna [(doc_id, score)] ordenado por relevancia.
+        Cada grupo es la lista de términos [(term_id, peso)] en que se expandió un token de la query.
+        Solo se devuelven los documentos que cubren el mayor número de grupos, de modo que
+        si alguno los contiene todos no se mezclan coincidencias sueltas.
+        """
+        scores = defaultdict(float)
+        matched = defaultdict(int)
+
+        for group in groups:
+            best = {}
+            for term_id, match_weight in group:
+                idf = self._idf(term_id)
+                for p in range(self.offsets[term_id], self.offsets[term_id + 1]):
+                    doc_id = self.doc_ids[p]
+                    tf = self.weights[p]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / self.avg_doc_length)
+                    score = match_weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+
+            for doc_id, score in best.items():
+                scores[doc_id] += score
+                matched[doc_id] += 1
+
+        if not scores:
+            return []
+
+        coverage = max(matched.values())
+        ranked = sorted(
+            ((doc_id, score) for doc_id, score in scores.items() if matched[doc_id] == coverage),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return ranked[:top_k]
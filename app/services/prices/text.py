@@ -0,0 +1,60 @@
+import re
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto para búsquedas:
+    - Convierte a minúsculas
+    - Quita acentos y diacríticos
+    - Elimina caracteres no alfanuméricos (excepto espacios)
+    """
+    if not text:
+        return ""
+    
+    text = text.lower()
+    text = unicodedata.normalize('NFKD', text)
+    text = "".join([c for c in text if not unicodedata.combining(c)])
+    text = re.sub(r'[^a-z0-9\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    
+    return text
+
+
+def _parse_number(token: str) -> float:
+    # Soporta separadores de miles y decimales: "4.500", "1.500,50", "1,500.50", "1500.5".
+    # Con los dos separadores, el último es el decimal.
+    if "," in token and "." in token:
+        decimal, thousands = (",", ".") if token.rfind(",") > token.rfind(".") else (".", ",")
+        token = token.replace(thousands, "").replace(decimal, ".")
+    else:
+        for sep in (",", "."):
+            if sep in token:
+                parts = token.split(sep)
+                if all(len(part) == 3 for part in parts[1:]):
+                    token = "".join(parts)
+                else:
+                    token = token.replace(sep, ".")
+    return float(token)
+
+
+def parse_price_range(value) -> tuple:
+    """
+    Convierte el texto de precio del CSV en un rango numérico (min, max):
+    - "1500" -> (1500.0, 1500.0)
+    - "8500-9000" -> (8500.0, 9000.0)
+    - "desde 4.500" -> (4500.0, 4500.0)
+    - "1.500,50" o "1,500.50" -> (1500.5, 1500.5)
+    Retorna (None, None) si no hay ningún número.
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        if value != value:  # NaN
+            return None, None
+        return float(value), float(value)
+
+    numbers = [_parse_number(token) for token in re.findall(r"\d+(?:[.,]\d+)*", str(value))]
+    if not numbers:
+        return None, None
+    return min(numbers), max(numbers)
@@ -1,71 +1,207 @@
-import holidays
-from zoneinfo import ZoneInfo
-from datetime import datetime, time
-from langchain_core.tools import tool
+import json
+import asyncio
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
 
+from app.core.logging_config import logger
+from app.services.db.pool import database
+from app.services.cloud.azure import azure_tools
 
-# Obtener hora actual de España
-def get_current_time_spain() -> datetime:
-    madrid_tz = ZoneInfo("Europe/Madrid")
-    return datetime.now(madrid_tz)
 
-@tool
-async def is_customer_service_available(input: str = "") -> bool:
+@dataclass(frozen=True)
+class ToolSpec:
     """
-    Indica si el personal de servicio al cliente está disponible actualmente en España.
-    
-    Retorna True si estamos dentro del horario de atención, False si no.
-    Horarios de atención:
-      - Lunes a viernes: 08:00-12:00 y 14:00-18:00
-      - Sábado: 08:00-12:00
-      - Domingos y festivos: no disponible
+    Herramienta que el modelo puede invocar (function calling).
+
+    - name / description / parameters: esquema JSON que se envía al modelo.
+    - handler: función que la implementa; recibe los argumentos del modelo como kwargs
+      y retorna un string (normalmente JSON).
+    - is_async: si `handler` es una corrutina. Las funciones síncronas se ejecutan
+      fuera del event loop con `offload` (por defecto `asyncio.to_thread`).
+    - timeout: segundos máximos de espera. Al vencer se responde un error al modelo;
+      un handler síncrono ya en marcha termina en su hilo, pero no se espera.
+    - cacheable: si una respuesta que usó esta herramienta puede guardarse en la caché
+      de respuestas (sin estado ni efectos por usuario o por hora).
     """
-    now = get_current_time_spain()
-    dia_semana = now.weekday()  # Lunes=0, Domingo=6
+    name: str
+    description: str
+    parameters: dict
+    handler: Callable[..., Any]
+    timeout: float = 10.0
+    cacheable: bool = False
+    is_async: Optional[bool] = None
+    offload: Optional[Callable[..., Awaitable[Any]]] = None
+    schema: dict = field(init=False, repr=False)
 
-    # Lista de festivos en España
-    es_holidays = holidays.Spain(years=now.year)
+    def __post_init__(self):
+        if self.is_async is None:
+            object.__setattr__(self, "is_async", inspect.iscoroutinefunction(self.handler))
+        object.__setattr__(self, "schema", {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters,
+            },
+        })
 
-    # Si es domingo o festivo
-    if dia_semana == 6 or now.date() in es_holidays:
-        return False
+    async def run(self, arguments: dict) -> str:
+        if self.is_async:
+            call = self.handler(**arguments)
+        else:
+            call = (self.offload or asyncio.to_thread)(self.handler, **arguments)
+        return await asyncio.wait_for(call, timeout=self.timeout)
 
-    # Horario de lunes a viernes
-    if 0 <= dia_semana <= 4:
-        if time(8,0) <= now.time() <= time(12,0) or time(14,0) <= now.time() <= time(18,0):
-            return True
 
-    # Horario sábado
-    if dia_semana == 5:
-        if time(8,0) <= now.time() <= time(12,0):
-            return True
+class ToolRegistry:
+    """Registro de herramientas: esquemas para el modelo y ejecución concurrente de tool calls."""
 
-    return False
+    def __init__(self, specs=()):
+        self._tools = {}
+        self._schemas = []
+        for spec in specs:
+            self.register(spec)
 
+    def register(self, spec: ToolSpec):
+        if spec.name in self._tools:
+            raise ValueError(f"Tool already registered: {spec.name}")
+        self._tools[spec.name] = spec
+        self._schemas = [spec.schema for spec in self._tools.values()]
 
-tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "is_customer_service_available",
-                "description": "Comprueba si el servicio de atención al cliente está disponible actualmente en España. "
-                                "Utilízala cuando el usuario pregunte si puede ser atendido por un asesor, "
-                                "si hay soporte disponible, o si el horario de atención está activo. "
-                                "Devuelve True si el servicio está disponible en este momento, de lo contrario False.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "input": {
-                            "type": "string",
-                            "description": (
-                                "Texto opcional proporcionado por el usuario. "
-                                "Puede incluir su consulta o contexto, aunque no es necesario "
-                                "para determinar la disponibilidad del servicio."
-                            ),
-                        },
-                    },
-                    "required": [],
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._tools.get(name)
+
+    @property
+    def schemas(self) -> list:
+        """
+        Lista `tools` para `chat.completions.create`. Es la misma lista en cada llamada
+        (orden de registro), así el prefijo del prompt no cambia y Azure puede cachearlo.
+        """
+        return self._schemas
+
+    async def call(self, name: str, arguments) -> str:
+        """
+        Ejecuta una herramienta con los argumentos del modelo (string JSON o dict).
+        Nunca lanza: los errores se devuelven al modelo como {"error": ...}.
+        """
+        spec = self._tools.get(name)
+        if spec is None:
+            return json.dumps({"error": f"Función desconocida: {name}"})
+
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments or "{}")
+            except ValueError:
+                logger.warning(f"⚠️ Argumentos inválidos para {name}: {arguments}")
+                return json.dumps({"error": f"Argumentos inválidos para {name}."})
+        if not isinstance(arguments, dict):
+            return json.dumps({"error": f"Argumentos inválidos para {name}."})
+
+        # Solo se pasan los parámetros declarados en el esquema
+        allowed = spec.parameters.get("properties", {})
+        arguments = {key: value for key, value in arguments.items() if key in allowed}
+
+        logger.info(f"🧩 Tool Call: {name} | Args: {arguments}")
+        try:
+            return await spec.run(arguments)
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ Tool {name} superó su timeout de {spec.timeout}s")
+            return json.dumps({"error": f"La función {name} no respondió a tiempo."})
+        except Exception as e:
+            logger.exception(f"💥 Error ejecutando función {name}: {e}")
+            return json.dumps({"error": str(e)})
+
+    def is_cacheable(self, tool_calls) -> bool:
+        return all(
+            self._tools.get(tool_call.function.name) is not None and self._tools[tool_call.function.name].cacheable
+            for tool_call in tool_calls
+        )
+
+    async def call_many(self, tool_calls) -> list:
+        """Ejecuta en paralelo los tool_calls de un turno; las respuestas conservan el orden."""
+        return await asyncio.gather(*(
+            self.call(tool_call.function.name, tool_call.function.arguments)
+            for tool_call in tool_calls
+        ))
+
+
+tool_registry = ToolRegistry([
+    ToolSpec(
+        name="is_customer_service_available",
+        description="Comprueba si el servicio de atención al cliente está disponible actualmente en España. "
+                    "Utilízala cuando el usuario pregunte si puede ser atendido por un asesor, "
+                    "si hay soporte disponible, o si el horario de atención está activo. "
+                    "Devuelve True si el servicio está disponible en este momento, de lo contrario False.",
+        parameters={
+            "type": "object",
+            "properties": {
+                "input": {
+                    "type": "string",
+                    "description": (
+                        "Texto opcional proporcionado por el usuario. "
+                        "Puede incluir su consulta o contexto, aunque no es necesario "
+                        "para determinar la disponibilidad del servicio."
+                    ),
+                },
+            },
+            "required": [],
+        },
+        handler=azure_tools.is_customer_service_available,
+        timeout=2.0,
+    ),
+    ToolSpec(
+        name="save_user",
+        description="Guarda la información de un usuario en la base de datos. "
+                    "Utilízala cuando el usuario proporcione su nombre y correo electrónico "
+                    "para registrarse, dejar sus datos de contacto o continuar una solicitud con un asesor. "
+                    "La función almacena el registro en la tabla 'users'. "
+                    "Devuelve un objeto JSON con el estado de la operación ('status') y un mensaje descriptivo ('message').",
+        parameters={
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": (
+                        "Nombre del usuario. "
+                    ),
+                },
+                "email": {
+                    "type": "string",
+                    "description": (
+                        "Correo electronico del usuario, se usa para que un asesor de atencion al clinete contacte al usuario en horario disponible. "
+                    ),
+                },
+            },
+            "required": ["name", "email"],
+        },
+        handler=azure_tools.save_user,
+        # SQL bloqueante: se ejecuta en el executor de base de datos (dimensionado como el pool)
+        offload=database.run,
+        timeout=15.0,
+    ),
+    ToolSpec(
+        name="procedures_and_treatments_price_list",
+        description="Busca coincidencias de procedimientos, tratamientos y cirugías en el archivo de precios "
+                    "almacenado en Azure Blob Storage. La búsqueda es insensible a mayúsculas, acentos y caracteres especiales, "
+                    "y soporta coincidencias parciales, errores ortográficos y búsqueda por múltiples palabras sin importar el orden. "
+                    "Devuelve un string JSON con los resultados encontrados o un mensaje explicativo si no hay coincidencias.",
+        parameters={
+            "type": "object",
+            "properties": {
+                "name_surgery_or_treatment": {
+                    "type": "string",
+                    "description": (
+                        "Nombre de la cirugía o tratamiento que se desea buscar en la lista de precios. "
+                        "Puede ser parcial o contener varias palabras."
+                    ),
                 },
-            }
+            },
+            "required": ["name_surgery_or_treatment"],
         },
-    ]
\ No newline at end of file
+        handler=azure_tools.procedures_and_treatments_price_list,
+        timeout=5.0,
+        # Los precios dependen solo de la lista, cuyo etag forma parte de la versión de la caché
+        cacheable=True,
+    ),
+])
@@ -45,13 +45,16 @@ class ZohoClient:
     # ---------------------------------------------------------------------
     # ✔️ function to send the final response via API callback/response
     # ---------------------------------------------------------------------
-    async def send_progress_update(self, request_id: str):
-        """Send a 'progress' message to extend Zoho's timeout."""
+    async def send_progress_update(self, request_id: str, text: str = None):
+        """
+        Send a 'progress' message to extend Zoho's timeout.
+        With `text`, the progress carries partial answer text (streaming mode).
+        """
 
         url = f"https://{constants.ZOHOSALESIQ_SERVER_URI}/api/v2/{constants.SCREENNAME}/callbacks/{request_id}/progress"
         
         payload = {
-            "text": "Just a few more seconds.."
+            "text": text or "Just a few more seconds.."
         }
 
         await self._post(url=url, payload=payload)